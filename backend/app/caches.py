@@ -0,0 +1,330 @@
+"""메모리(LRU)·디스크 캐시와 만료 시간이 있는 세션 저장소"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from .readers import COMPACT_FRAMES
+
+class LRUCache:
+    """메모리 예산(바이트) 기반 LRU 캐시, 히트/미스 카운터 포함"""
+    
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+    
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None):
+        if size is None:
+            size = estimate_size(value)
+        with self._lock:
+            if key in self._items:
+                self.current_bytes -= self._items.pop(key)[1]
+            # 예산보다 큰 항목은 저장하지 않음
+            if size > self.max_bytes:
+                return
+            self._items[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'items': len(self._items),
+                'bytes': self.current_bytes,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+def estimate_size(value: Any) -> int:
+    """캐시 항목의 대략적인 메모리 크기 (바이트)
+    
+    표는 memory_usage로, 표를 담은 튜플·딕셔너리는 항목별로 더하고 작은 값만 pickle 크기로 잰다.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(item) for item in value.values())
+    if isinstance(value, tuple):
+        return sum(estimate_size(item) for item in value)
+    return len(pickle.dumps(value, protocol=5))
+
+# 파싱된 파일(파일 해시 -> (DataFrame, 열 목록))과 비교 결과((종류, 해시1, 해시2, ...) -> 결과) 캐시
+parsed_cache = LRUCache('parsed', int(os.environ.get('PARSED_CACHE_MB', '512')) * 1024 * 1024)
+result_cache = LRUCache('result', int(os.environ.get('RESULT_CACHE_MB', '128')) * 1024 * 1024)
+
+# 파싱 결과 디스크 캐시 (DISK_CACHE_DIR가 비어 있으면 사용 안 함, pyarrow 필요)
+DISK_CACHE_DIR = os.environ.get('DISK_CACHE_DIR', '')
+DISK_CACHE_MB = int(os.environ.get('DISK_CACHE_MB', '2048'))
+# 정리 명령(cache-clean)에서 이 기간 동안 읽지 않은 파일은 삭제 (일)
+DISK_CACHE_MAX_AGE_DAYS = float(os.environ.get('DISK_CACHE_MAX_AGE_DAYS', '30'))
+
+class DiskCache:
+    """파싱 결과를 Arrow IPC(Feather v2, 비압축) 파일로 저장하고 메모리 맵으로 다시 읽는 영구 캐시
+    
+    파일 이름은 키(내용 해시, 시트, 읽은 열)와 COMPACT_FRAMES 설정으로 정한다.
+    읽을 때마다 수정 시각을 갱신하고, 용량을 넘으면 가장 오래 읽지 않은 파일부터 지운다.
+    """
+    
+    SUFFIX = '.arrow'
+    COLUMNS_METADATA_KEY = b'compare_orders.columns'
+    # df.attrs (압축 전 크기 등, pyarrow 버전에 따라 pandas 메타데이터에 남지 않으므로 따로 저장)
+    ATTRS_METADATA_KEY = b'compare_orders.attrs'
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory if directory and self._pyarrow_available() else ''
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _pyarrow_available() -> bool:
+        try:
+            import pyarrow  # noqa: F401
+            return True
+        except ImportError:
+            return False
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+    
+    def _path(self, key: Hashable) -> str:
+        name = hashlib.sha256(repr((key, COMPACT_FRAMES)).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + self.SUFFIX)
+    
+    def get(self, key: Hashable) -> Optional[Tuple[pd.DataFrame, List[Any]]]:
+        if not self.enabled:
+            return None
+        import pyarrow as pa
+        
+        path = self._path(key)
+        try:
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+            metadata = table.schema.metadata
+            columns = json.loads(metadata[self.COLUMNS_METADATA_KEY])
+            df = table.to_pandas()
+            if self.ATTRS_METADATA_KEY in metadata:
+                df.attrs.update(json.loads(metadata[self.ATTRS_METADATA_KEY]))
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # 쓰다 만 파일이나 다른 버전 형식이면 지우고 다시 파싱
+            self.misses += 1
+            self._remove(path)
+            return None
+        self.hits += 1
+        return df, columns
+    
+    def put(self, key: Hashable, loaded: Tuple[pd.DataFrame, List[Any]]):
+        """파싱 결과 저장 (문자열이 아닌 열 이름처럼 Arrow로 그대로 옮길 수 없으면 저장하지 않음)"""
+        df, columns = loaded
+        if not self.enabled or not all(isinstance(column, str) for column in [*df.columns, *columns]):
+            return
+        import pyarrow as pa
+        
+        path = self._path(key)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                self.COLUMNS_METADATA_KEY: json.dumps(columns, ensure_ascii=False).encode('utf-8'),
+                self.ATTRS_METADATA_KEY: json.dumps(df.attrs).encode('utf-8')
+            })
+            os.makedirs(self.directory, exist_ok=True)
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            # 다른 요청이 쓰는 중인 파일을 읽지 않도록 다 쓴 뒤 이름 변경
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            return
+        self.writes += 1
+        self.evict()
+    
+    def _files(self) -> List[Tuple[str, os.stat_result]]:
+        """캐시 파일 목록 (오래 읽지 않은 순)"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        files = []
+        for name in names:
+            if name.endswith(self.SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    files.append((path, os.stat(path)))
+                except FileNotFoundError:
+                    continue
+        return sorted(files, key=lambda item: item[1].st_mtime)
+    
+    def _remove(self, path: str) -> bool:
+        try:
+            os.unlink(path)
+            return True
+        except OSError:
+            return False
+    
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """전체 크기가 max_bytes 이하가 될 때까지 오래 읽지 않은 파일부터 삭제하고 삭제 수 반환"""
+        if not self.enabled:
+            return 0
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        with self._lock:
+            files = self._files()
+            total = sum(stat.st_size for _, stat in files)
+            removed = 0
+            for path, stat in files:
+                if total <= max_bytes:
+                    break
+                if self._remove(path):
+                    total -= stat.st_size
+                    removed += 1
+            self.evictions += removed
+            return removed
+    
+    def cleanup(self, max_age_days: float = DISK_CACHE_MAX_AGE_DAYS, clear: bool = False) -> Dict[str, Any]:
+        """오래된 파일과 남은 임시 파일을 지우고 용량 한도로 줄이기 (clear면 전부 삭제)"""
+        if not self.enabled:
+            return {'enabled': False}
+        removed = 0
+        cutoff = time.time() - max_age_days * 24 * 3600
+        for path, stat in self._files():
+            if (clear or stat.st_mtime < cutoff) and self._remove(path):
+                removed += 1
+        # 쓰다가 중단된 임시 파일 (한 시간 넘게 남은 것만)
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            path = os.path.join(self.directory, name)
+            if name.endswith('.tmp') and os.stat(path).st_mtime < time.time() - 3600 and self._remove(path):
+                removed += 1
+        removed += self.evict()
+        return {**self.stats(), 'removed': removed}
+    
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {'enabled': False}
+        files = self._files()
+        return {
+            'enabled': True,
+            'directory': self.directory,
+            'files': len(files),
+            'bytes': sum(stat.st_size for _, stat in files),
+            'maxBytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'evictions': self.evictions
+        }
+
+disk_cache = DiskCache(DISK_CACHE_DIR, DISK_CACHE_MB * 1024 * 1024)
+
+class SessionStore:
+    """비교 세션 저장소 (세션 ID -> 값), 마지막 사용 후 TTL이 지나면 만료
+    
+    max_bytes를 주면 세션 값 크기(sizeof) 합계도 제한한다. 세션 값은 후속 조회로 커질 수 있으므로
+    (메모한 분석 결과) 크기는 세션을 만들거나 조회할 때마다 다시 잰다. sizeof는 가벼워야 한다.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: int,
+        max_sessions: int,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = estimate_size
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.evictions = 0
+        self._sessions: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def create(self, value: Any) -> str:
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._purge_expired()
+            self._sessions[session_id] = (value, time.monotonic() + self.ttl_seconds)
+            self._evict()
+        return session_id
+    
+    def get(self, session_id: str) -> Any:
+        with self._lock:
+            self._purge_expired()
+            item = self._sessions.get(session_id)
+            if item is None:
+                return None
+            self._sessions[session_id] = (item[0], time.monotonic() + self.ttl_seconds)
+            self._sessions.move_to_end(session_id)
+            self._evict()
+            return item[0]
+    
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+    
+    def _evict(self):
+        """최대 개수나 메모리 예산을 넘으면 가장 오래 사용하지 않은 세션부터 제거 (방금 사용한 세션은 남김)"""
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        if self.max_bytes is None:
+            return
+        total = sum(self.sizeof(value) for value, _ in self._sessions.values())
+        while total > self.max_bytes and len(self._sessions) > 1:
+            _, (value, _) = self._sessions.popitem(last=False)
+            total -= self.sizeof(value)
+            self.evictions += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._purge_expired()
+            return {
+                'items': len(self._sessions),
+                'bytes': sum(self.sizeof(value) for value, _ in self._sessions.values()),
+                'maxItems': self.max_sessions,
+                'maxBytes': self.max_bytes,
+                'evictions': self.evictions
+            }
+    
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [session_id for session_id, (_, expires_at) in self._sessions.items() if expires_at <= now]
+        for session_id in expired:
+            del self._sessions[session_id]
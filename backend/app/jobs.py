@@ -0,0 +1,197 @@
+"""CPU 작업 실행기(동시 실행·대기 한도)와 백그라운드 비교 작업"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+
+from fastapi import HTTPException
+
+from .caches import SessionStore
+from .metrics import _request_timing
+
+# 비교 작업 실행기 설정 (동시 실행 수 + 대기열 크기를 넘으면 503 응답)
+MAX_CONCURRENT_JOBS = int(os.environ.get('MAX_CONCURRENT_JOBS', '2'))
+MAX_QUEUED_JOBS = int(os.environ.get('MAX_QUEUED_JOBS', '8'))
+RETRY_AFTER_SECONDS = int(os.environ.get('RETRY_AFTER_SECONDS', '10'))
+
+_job_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix='compare')
+_pending_jobs = 0
+
+def check_job_capacity():
+    """실행 중 + 대기 중인 작업이 한도에 차면 503 (Retry-After 포함)"""
+    if _pending_jobs >= MAX_CONCURRENT_JOBS + MAX_QUEUED_JOBS:
+        raise HTTPException(
+            status_code=503,
+            detail="처리 대기 중인 비교 작업이 많습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+
+def reserve_job_slot():
+    """작업 한도를 확인하고 자리 하나를 차지 (끝나면 release_job_slot)"""
+    global _pending_jobs
+    check_job_capacity()
+    _pending_jobs += 1
+
+def release_job_slot():
+    global _pending_jobs
+    _pending_jobs -= 1
+
+async def _execute_blocking(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # 요청의 단계별 시간 기록이 실행기 스레드에서도 이어지도록 컨텍스트를 넘김
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_job_executor, context.run, functools.partial(func, *args, **kwargs))
+
+async def run_blocking(func, *args, **kwargs):
+    """CPU 작업을 이벤트 루프 밖의 전용 실행기에서 실행"""
+    reserve_job_slot()
+    try:
+        return await _execute_blocking(func, *args, **kwargs)
+    finally:
+        release_job_slot()
+
+async def run_admitted(func, *args, **kwargs):
+    """이미 한도 확인을 거친 요청이 나눠 보내는 CPU 작업 실행 (일괄 비교의 쌍별 비교)
+    
+    한도를 다시 확인하지 않아 도중에 503으로 끊기지 않지만, 실행 중·대기 중인 작업 수에는 포함되어
+    다른 요청의 한도 확인에 반영된다.
+    """
+    global _pending_jobs
+    _pending_jobs += 1
+    try:
+        return await _execute_blocking(func, *args, **kwargs)
+    finally:
+        release_job_slot()
+
+def pending_jobs() -> int:
+    """실행 중이거나 대기 중인 작업 수"""
+    return _pending_jobs
+
+def shutdown_job_executor():
+    _job_executor.shutdown(wait=False, cancel_futures=True)
+
+# 백그라운드 작업 설정
+JOB_TTL_SECONDS = int(os.environ.get('JOB_TTL_SECONDS', os.environ.get('SESSION_TTL_SECONDS', '1800')))
+# SSE 진행 상황 확인 간격 (초)
+JOB_EVENT_INTERVAL = float(os.environ.get('JOB_EVENT_INTERVAL', '0.5'))
+
+class JobCancelled(Exception):
+    """취소 요청된 작업이 다음 단계로 넘어가려 할 때"""
+
+class Job:
+    """백그라운드 비교 작업의 상태 (단계별 진행, 결과, 취소 요청)
+    
+    pandas 연산은 중간에 끊을 수 없으므로 취소는 단계 사이에서 적용된다.
+    대기 중에 취소된 작업은 실행 차례가 와도 아무것도 하지 않고 끝난다.
+    """
+    
+    FINISHED = ('done', 'failed', 'cancelled')
+    
+    def __init__(self, stages: List[str]):
+        self.id: Optional[str] = None
+        self.status = 'queued'
+        self.stages = stages
+        self.stage: Optional[str] = None
+        self.completed_stages = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None  # 실행 중 태스크가 GC되지 않도록 보관
+        self._cancel_requested = threading.Event()
+        self._lock = threading.Lock()
+    
+    def advance(self, stage: str):
+        """다음 단계 시작 (취소 요청이 있으면 JobCancelled)"""
+        if self._cancel_requested.is_set():
+            raise JobCancelled()
+        with self._lock:
+            if self.stage is not None:
+                self.completed_stages += 1
+            self.stage = stage
+    
+    def run(self, func, *args, **kwargs):
+        """실행기 스레드에서 작업 함수를 실행하고 결과 또는 오류를 기록"""
+        if self._cancel_requested.is_set():
+            self._finish('cancelled')
+            return
+        self.status = 'running'
+        self.started_at = time.time()
+        try:
+            result = func(self, *args, **kwargs)
+        except JobCancelled:
+            self._finish('cancelled')
+        except HTTPException as e:
+            self._finish('failed', error=e.detail)
+        except Exception as e:
+            self._finish('failed', error=str(e))
+        else:
+            with self._lock:
+                self.completed_stages = len(self.stages)
+                self.stage = None
+            self._finish('done', result=result)
+    
+    def cancel(self) -> bool:
+        """취소 요청 (이미 끝난 작업이면 False)"""
+        if self.status in self.FINISHED:
+            return False
+        self._cancel_requested.set()
+        return True
+    
+    def _finish(self, status: str, result: Any = None, error: Optional[str] = None):
+        with self._lock:
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self.status = status
+    
+    def snapshot(self, include_result: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {
+                'jobId': self.id,
+                'status': self.status,
+                'stage': self.stage,
+                'stages': self.stages,
+                'completedStages': self.completed_stages,
+                'totalStages': len(self.stages),
+                'cancelRequested': self._cancel_requested.is_set(),
+                'createdAt': self.created_at,
+                'startedAt': self.started_at,
+                'finishedAt': self.finished_at,
+                'error': self.error
+            }
+            if include_result and self.status == 'done':
+                snapshot['result'] = self.result
+        return snapshot
+
+jobs = SessionStore(JOB_TTL_SECONDS, int(os.environ.get('MAX_JOBS', '50')))
+
+async def _run_job(job: Job, cleanup: Callable[[], None], func, *args, **kwargs):
+    """submit_job이 차지한 자리에서 작업을 돌리고 끝나면(실패·취소 포함) 자리 반납과 cleanup 호출"""
+    # 작업 단계 시간은 작업을 등록한 요청의 Server-Timing에 섞이지 않게 지표로만 기록
+    _request_timing.set(None)
+    try:
+        await _execute_blocking(job.run, func, *args, **kwargs)
+    except Exception as e:
+        # 작업 함수의 오류는 job.run이 기록하므로 실행기 종료처럼 실행 자체가 실패한 경우
+        job._finish('failed', error=str(e))
+    finally:
+        release_job_slot()
+        cleanup()
+
+def submit_job(stages: List[str], cleanup: Callable[[], None], func, *args, **kwargs) -> Job:
+    """작업을 등록하고 바로 반환 (등록할 때 실행 자리를 차지하므로 한도를 넘으면 503, 끝나면 cleanup 호출)"""
+    reserve_job_slot()
+    try:
+        job = Job(stages)
+        job.id = jobs.create(job)
+        job.task = asyncio.get_running_loop().create_task(_run_job(job, cleanup, func, *args, **kwargs))
+    except BaseException:
+        release_job_slot()
+        raise
+    return job
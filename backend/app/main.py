@@ -1,12 +1,52 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import Depends, FastAPI, File, UploadFile, HTTPException, Header, Path, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
-import io
+from typing import Dict, List, Any, Callable, Optional, Tuple, Union, BinaryIO, Hashable, Iterator, NamedTuple
+import abc
+import asyncio
+import functools
+import hashlib
+import json
 import tempfile
 import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+import uuid
+import weakref
+import zipfile
+
+from .caches import SessionStore, disk_cache, estimate_size, parsed_cache, result_cache
+from .jobs import (
+    JOB_EVENT_INTERVAL,
+    Job,
+    check_job_capacity,
+    jobs,
+    pending_jobs,
+    run_admitted,
+    run_blocking,
+    shutdown_job_executor,
+    submit_job
+)
+from .metrics import RequestMetricsMiddleware, metrics, timed
+from .profiling import PROFILE_DIR, check_profile_request, is_profiling, run_profiled
+from .readers import (
+    AMOUNT_COLUMNS,
+    ORDER_COLUMNS,
+    PARALLEL_LOAD,
+    READ_COLUMNS,
+    SheetNotFoundError,
+    TEXT_COLUMNS,
+    detect_file_format,
+    frame_memory_report,
+    load_order_files,
+    shutdown_load_pool
+)
 
 app = FastAPI(title="Excel Compare API")
 
@@ -18,31 +58,191 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+
+
+def order_bincount(codes: np.ndarray, n_orders: int, values: Optional[pd.Series] = None) -> np.ndarray:
+    """주문번호 코드별 행 수 또는 값 합계 (빈 주문번호 -1과 빈 값은 제외, groupby().sum()과 같은 결과)"""
+    valid = codes >= 0
+    if values is None:
+        return np.bincount(codes[valid], minlength=n_orders)
+    weights = values.to_numpy(dtype=float, na_value=0.0)[valid]
+    return np.bincount(codes[valid], weights=weights, minlength=n_orders)
+
+def order_totals(df: pd.DataFrame, codes: np.ndarray, n_orders: int, fields: List[str]) -> np.ndarray:
+    """주문번호 코드별 필드 합계 (주문 수 x 필드 수)"""
+    totals = np.zeros((n_orders, len(fields)))
+    for i, field in enumerate(fields):
+        totals[:, i] = order_bincount(codes, n_orders, df[field])
+    return totals
+
+def normalize_order_keys(values: pd.Series) -> pd.Series:
+    """주문번호를 비교 가능한 문자열 키로 정규화 (1234, 1234.0, ' 1234' -> '1234')"""
+    if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+        values = values.astype('Int64')
+    keys = values.astype('string').str.strip()
+    return keys.mask(keys == '')
 
-class ExcelComparator:
-    def __init__(self, file1_path: str, file2_path: str):
-        self.df1 = pd.read_excel(file1_path, sheet_name=0)
-        self.df2 = pd.read_excel(file2_path, sheet_name=0)
+def factorize_order_keys(keys: List[pd.Series]) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """파일별 정규화된 주문번호 키를 모든 파일 공통의 정수 코드로 인코딩
     
-    def get_summary(self) -> Dict[str, int]:
-        """파일 요약 정보"""
-        orders1 = set(self.df1['주문번호'].astype(str).unique())
-        orders2 = set(self.df2['주문번호'].astype(str).unique())
-        common_orders = orders1 & orders2
-        
+    (정렬된 주문번호 배열, 파일별 코드)를 돌려준다. 코드는 주문번호 배열의 위치이고 빈 주문번호는 -1이다.
+    """
+    codes, order_keys = pd.factorize(pd.concat(keys, ignore_index=True), sort=True)
+    return np.asarray(order_keys, dtype=object), np.split(codes, np.cumsum([len(k) for k in keys])[:-1])
+
+# 비교 세션 (/api/compare 결과의 sessionId로 내보내기 등 후속 요청 처리)
+SESSION_TTL_SECONDS = int(os.environ.get('SESSION_TTL_SECONDS', '1800'))
+# 세션 수와 함께 세션이 들고 있는 표의 전체 크기도 제한 (넘으면 오래 사용하지 않은 세션부터 제거)
+SESSION_MEMORY_MB = int(os.environ.get('SESSION_MEMORY_MB', '1024'))
+sessions = SessionStore(
+    SESSION_TTL_SECONDS,
+    int(os.environ.get('MAX_SESSIONS', '20')),
+    max_bytes=SESSION_MEMORY_MB * 1024 * 1024,
+    sizeof=lambda comparator: comparator.memory_bytes()
+)
+
+def common_numeric_fields(frames: List[pd.DataFrame]) -> List[str]:
+    """모든 파일에 공통으로 있는 숫자 열 (주문번호 제외, 첫 파일의 열 순서)"""
+    return [
+        column for column in frames[0].columns
+        if column != '주문번호'
+        and all(
+            column in df.columns
+            and pd.api.types.is_numeric_dtype(df[column])
+            and not pd.api.types.is_bool_dtype(df[column])
+            for df in frames
+        )
+    ]
+
+EXCLUSIVE_ORDER_COLUMNS = ['orderNo', 'customerName', 'productCount', 'totalAmount', 'products']
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """표를 JSON 레코드 목록으로 (빈 값 NaN은 null)"""
+    if df.isna().to_numpy().any():
+        df = df.astype(object).where(df.notna(), None)
+    return df.to_dict('records')
+
+def section_data(value: Any) -> Any:
+    """compare_sections의 섹션 값을 응답 형식으로 (표와 표 딕셔너리는 레코드 목록)"""
+    if isinstance(value, pd.DataFrame):
+        return frame_records(value)
+    if isinstance(value, dict) and value and all(isinstance(item, pd.DataFrame) for item in value.values()):
+        return {key: frame_records(item) for key, item in value.items()}
+    return value
+
+def render_comparison(sections: Dict[str, Any], summary_only: bool = False) -> Dict[str, Any]:
+    """compare_sections 결과를 /api/compare 응답 형식으로 (summary_only면 목록 대신 건수)"""
+    shipping_fee = sections['shippingFee']
+    exclusive_orders = sections['exclusiveOrders']
+    if summary_only:
         return {
-            'totalRows1': len(self.df1),
-            'totalRows2': len(self.df2),
-            'totalOrders1': len(orders1),
-            'totalOrders2': len(orders2),
-            'commonOrders': len(common_orders),
-            'differentOrders': len(orders1 ^ orders2)
+            'summary': sections['summary'],
+            'columnComparison': sections['columnComparison'],
+            'differences': {
+                'shippingFeeCount': len(shipping_fee),
+                'amounts': sections['amounts']
+            },
+            'exclusiveOrderCounts': {side: len(frame) for side, frame in exclusive_orders.items()}
         }
+    return {
+        'summary': sections['summary'],
+        'columnComparison': sections['columnComparison'],
+        'differences': {
+            'shippingFee': section_data(shipping_fee),
+            'amounts': sections['amounts']
+        },
+        'exclusiveOrders': section_data(exclusive_orders)
+    }
+
+class ComparatorBase(abc.ABC):
+    """비교기 공통 부분 (분석 결과 메모, 메모리 보고), 두 파일 비교기와 N개 파일 비교기 공용
+    
+    하위 클래스는 _memory_frames를 구현하고 생성할 때 _reset_memo를 호출한다.
+    모든 열 읽기(defer_all_columns)를 쓰는 하위 클래스는 읽은 결과로 표를 채우는 _set_frames(*loaded)도 둔다.
+    """
+    
+    # 분석 결과 메모 (_memoize)와 세션 메모리 예산용 크기 (memory_bytes)
+    _frames: Dict[Hashable, Any]
+    _memo_bytes: int
+    _frame_bytes: Optional[int]
+    # 열을 골라 읽었을 때 모든 열을 다시 읽는 함수 (defer_all_columns)
+    _all_columns_source: Optional[Callable[[], List[Tuple[pd.DataFrame, List[Any]]]]]
+    
+    def _reset_memo(self):
+        """분석 결과 메모, 크기 기록, 모든 열 읽기 연결 초기화 (표를 새로 채울 때)"""
+        self._frames = {}
+        self._memo_bytes = 0
+        self._frame_bytes = None
+        self._all_columns_source = None
+    
+    def defer_all_columns(self, load: Callable[[], List[Tuple[pd.DataFrame, List[Any]]]]):
+        """분석 열만 읽어 만든 비교기에 모든 열을 읽는 함수를 연결 (모든 열이 필요한 분석을 처음 할 때 한 번 호출)"""
+        self._all_columns_lock = threading.Lock()
+        self._all_columns_source = load
+    
+    def _ensure_all_columns(self):
+        """연결된 함수가 있으면 모든 열로 다시 읽어 표를 바꿈 (분석 결과 메모도 새로 계산)"""
+        if self._all_columns_source is None:
+            return
+        with self._all_columns_lock:
+            load = self._all_columns_source
+            if load is None:
+                return
+            with timed('parseAllColumns'):
+                self._set_frames(*load())
+    
+    def _memoize(self, key: Hashable, build):
+        """분석 결과 표를 비교기 단위로 한 번만 계산 (세션 후속 조회 재사용)"""
+        if key not in self._frames:
+            value = build()
+            self._frames[key] = value
+            self._memo_bytes += estimate_size(value)
+        return self._frames[key]
+    
+    def memory_bytes(self) -> int:
+        """들고 있는 표와 메모한 분석 결과의 대략적인 크기 (세션 저장소의 메모리 예산용, 바이트)"""
+        if self._frame_bytes is None:
+            self._frame_bytes = sum(estimate_size(df) for df in self._memory_frames().values())
+        return self._frame_bytes + self._memo_bytes
+    
+    def get_memory_report(self) -> Dict[str, Any]:
+        """비교기가 들고 있는 파일별 데이터의 메모리 사용량"""
+        report = {label: frame_memory_report(df) for label, df in self._memory_frames().items()}
+        report['totalBytes'] = sum(item['bytes'] for item in report.values())
+        return report
+    
+    @abc.abstractmethod
+    def _memory_frames(self) -> Dict[str, pd.DataFrame]:
+        """메모리 보고 대상 표 (이름 -> DataFrame)"""
+
+class OrderComparatorBase(ComparatorBase):
+    """두 파일 주문 비교 공통 로직 (결과 형식, 배송비 차이 정렬, 내보내기)
+    
+    하위 클래스는 추상 메서드(get_summary, get_amount_differences, get_exclusive_order_frames,
+    _shipping_aggregates, _memory_frames)를 구현하고, 생성할 때 아래 속성을 채운다.
+    """
+    
+    # 파일별 전체 열 목록
+    columns1: List[Any]
+    columns2: List[Any]
+    
+    @abc.abstractmethod
+    def get_summary(self) -> Dict[str, int]:
+        """파일 요약 정보"""
+    
+    @abc.abstractmethod
+    def get_amount_differences(self) -> List[Dict[str, Any]]:
+        """금액 필드 차이 분석"""
+    
+    @abc.abstractmethod
+    def get_exclusive_order_frames(self) -> Dict[str, pd.DataFrame]:
+        """각 파일에만 있는 주문 표 (onlyInFile1, onlyInFile2)"""
     
     def get_column_comparison(self) -> Dict[str, List[str]]:
         """열 비교"""
-        cols1 = set(self.df1.columns)
-        cols2 = set(self.df2.columns)
+        cols1 = set(self.columns1)
+        cols2 = set(self.columns2)
         
         return {
             'common': sorted(list(cols1 & cols2)),
@@ -52,95 +252,213 @@ class ExcelComparator:
     
     def get_exclusive_orders(self) -> Dict[str, List[Dict[str, Any]]]:
         """각 파일에만 있는 고유 주문번호 찾기"""
-        orders1 = set(self.df1['주문번호'].astype(str).unique())
-        orders2 = set(self.df2['주문번호'].astype(str).unique())
+        return {
+            side: frame.to_dict('records')
+            for side, frame in self.get_exclusive_order_frames().items()
+        }
+    
+    def get_shipping_differences(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """배송비 차이 분석 (limit 지정 시 차이가 큰 상위 N건만)"""
+        return self.get_shipping_difference_frame(limit=limit).to_dict('records')
+    
+    def get_shipping_difference_frame(self, limit: Optional[int] = None) -> pd.DataFrame:
+        """배송비 차이 표 (get_shipping_differences, CSV 내보내기 공용)"""
+        if 'shippingFee' in self._frames or limit is None:
+            frame = self._memoize('shippingFee', self._build_shipping_difference_frame)
+            return frame if limit is None else frame.head(limit)
+        return self._build_shipping_difference_frame(limit=limit)
+    
+    def _build_shipping_difference_frame(self, limit: Optional[int] = None) -> pd.DataFrame:
+        # 주문번호별 배송비 합계, 상품 수, 첫 수취인명
+        agg1, agg2 = self._shipping_aggregates()
+        merged = agg1.join(agg2, how='outer')
+        for col in ['shippingFee1', 'shippingFee2', 'productCount1', 'productCount2']:
+            merged[col] = merged[col].fillna(0)
+        merged['difference'] = merged['shippingFee1'] - merged['shippingFee2']
         
-        only_in_file1 = orders1 - orders2
-        only_in_file2 = orders2 - orders1
+        # 차이가 있는 주문만
+        diff_orders = merged[merged['difference'] != 0]
         
-        result = {
-            'onlyInFile1': [],
-            'onlyInFile2': []
-        }
+        # 차이 절대값 기준 정렬
+        abs_diff = diff_orders['difference'].abs()
+        if limit is not None:
+            ranked = abs_diff.nlargest(limit, keep='first').index
+        else:
+            ranked = abs_diff.sort_values(ascending=False, kind='stable').index
+        diff_orders = diff_orders.loc[ranked]
         
-        # 파일1에만 있는 주문
-        for order_no in only_in_file1:
-            df_order = self.df1[self.df1['주문번호'].astype(str) == order_no]
-            if not df_order.empty:
-                first_row = df_order.iloc[0]
-                result['onlyInFile1'].append({
-                    'orderNo': order_no,
-                    'customerName': first_row.get('수취인명', ''),
-                    'productCount': len(df_order),
-                    'totalAmount': float(df_order['판매액'].sum()) if '판매액' in df_order.columns else 0,
-                    'products': ', '.join(df_order['상품코드'].tolist()) if '상품코드' in df_order.columns else ''
-                })
+        # 파일1 수취인명이 없으면 파일2 수취인명 사용
+        name1 = diff_orders['customerName1']
+        customer_name = name1.where(name1.notna() & (name1 != ''), diff_orders['customerName2'])
         
-        # 파일2에만 있는 주문
-        for order_no in only_in_file2:
-            df_order = self.df2[self.df2['주문번호'].astype(str) == order_no]
-            if not df_order.empty:
-                first_row = df_order.iloc[0]
-                result['onlyInFile2'].append({
-                    'orderNo': order_no,
-                    'customerName': first_row.get('수취인명', ''),
-                    'productCount': len(df_order),
-                    'totalAmount': float(df_order['판매액'].sum()) if '판매액' in df_order.columns else 0,
-                    'products': ', '.join(df_order['상품코드'].tolist()) if '상품코드' in df_order.columns else ''
-                })
+        return pd.DataFrame({
+            'orderNo': diff_orders.index.astype(str),
+            'customerName': customer_name.fillna('').to_numpy(),
+            'shippingFee1': diff_orders['shippingFee1'].astype(float).to_numpy(),
+            'shippingFee2': diff_orders['shippingFee2'].astype(float).to_numpy(),
+            'difference': diff_orders['difference'].astype(float).to_numpy(),
+            'productCount1': diff_orders['productCount1'].astype(int).to_numpy(),
+            'productCount2': diff_orders['productCount2'].astype(int).to_numpy()
+        })
+    
+    @abc.abstractmethod
+    def _shipping_aggregates(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """파일별 주문 집계 (shippingFee{n}, productCount{n}, customerName{n}, 인덱스는 주문번호 키)"""
+    
+    def comparison_stages(self, limit: Optional[int] = None) -> List[Tuple[str, Any]]:
+        """비교 결과 섹션과 계산 함수 (빠른 요약부터, 주문별 표는 뒤로)"""
+        return [
+            ('summary', self.get_summary),
+            ('columnComparison', self.get_column_comparison),
+            ('amounts', self.get_amount_differences),
+            ('shippingFee', functools.partial(self.get_shipping_difference_frame, limit=limit)),
+            ('exclusiveOrders', self.get_exclusive_order_frames)
+        ]
+    
+    def compare_sections(self, limit: Optional[int] = None, on_stage=None) -> Dict[str, Any]:
+        """섹션별 비교 결과 (주문별 결과는 표 그대로, on_stage는 섹션을 시작할 때마다 호출)"""
+        sections = {}
+        for section, compute in self.comparison_stages(limit):
+            if on_stage is not None:
+                on_stage(section)
+            with timed(section):
+                sections[section] = compute()
+        return sections
+    
+    def compare(self, limit: Optional[int] = None, summary_only: bool = False) -> Dict[str, Any]:
+        """전체 비교 결과 (/api/compare 응답 형식)
         
-        return result
+        summary_only면 주문별 목록(배송비 차이, 고유 주문)은 빼고 건수만 담는다.
+        목록은 세션 조회 API로 페이지 단위로 가져간다.
+        """
+        return render_comparison(self.compare_sections(None if summary_only else limit), summary_only)
+    
+    def export_differences_to_csv(self) -> bytes:
+        """차이점을 CSV로 내보내기"""
+        return b''.join(self.iter_differences_csv())
+    
+    def iter_differences_csv(self) -> Iterator[bytes]:
+        """차이점 CSV를 청크 단위로 생성"""
+        return iter_csv(self.get_shipping_difference_frame())
+
+class ExcelComparator(OrderComparatorBase):
+    def __init__(
+        self,
+        file1_path: Union[str, BinaryIO],
+        file2_path: Union[str, BinaryIO],
+        parallel: Optional[bool] = None
+    ):
+        self._set_frames(*load_order_files([file1_path, file2_path], parallel=parallel, usecols=None))
+    
+    @classmethod
+    def from_frames(
+        cls,
+        loaded1: Tuple[pd.DataFrame, List[Any]],
+        loaded2: Tuple[pd.DataFrame, List[Any]]
+    ) -> 'ExcelComparator':
+        """이미 읽은 (DataFrame, 열 목록)으로 비교기 생성"""
+        comparator = cls.__new__(cls)
+        comparator._set_frames(loaded1, loaded2)
+        return comparator
     
-    def get_shipping_differences(self) -> List[Dict[str, Any]]:
-        """배송비 차이 분석"""
-        # 주문번호별 배송비 합계
-        shipping1 = self.df1.groupby('주문번호')['배송비'].sum().reset_index()
-        shipping1.columns = ['orderNo', 'shippingFee1']
+    def _set_frames(self, loaded1: Tuple[pd.DataFrame, List[Any]], loaded2: Tuple[pd.DataFrame, List[Any]]):
+        (self.df1, self.columns1), (self.df2, self.columns2) = loaded1, loaded2
+        self._reset_memo()
+        self._build_order_index()
+    
+    def _build_order_index(self):
+        """정규화된 주문번호 키를 두 파일 공통의 정수 코드로 한 번만 인코딩 (모든 분석이 이 코드로 집계)
         
-        shipping2 = self.df2.groupby('주문번호')['배송비'].sum().reset_index()
-        shipping2.columns = ['orderNo', 'shippingFee2']
+        코드는 정렬된 주문번호 순서(order_keys의 위치)이고 빈 주문번호는 -1이다.
+        """
+        self.keys1 = normalize_order_keys(self.df1['주문번호'])
+        self.keys2 = normalize_order_keys(self.df2['주문번호'])
         
-        # 병합
-        merged = pd.merge(shipping1, shipping2, on='orderNo', how='outer')
-        merged['shippingFee1'] = merged['shippingFee1'].fillna(0)
-        merged['shippingFee2'] = merged['shippingFee2'].fillna(0)
-        merged['difference'] = merged['shippingFee1'] - merged['shippingFee2']
+        self.order_keys, (self.codes1, self.codes2) = factorize_order_keys([self.keys1, self.keys2])
+        self.order_index = pd.Index(self.order_keys, name='orderNo')
         
-        # 차이가 있는 주문만
-        diff_orders = merged[merged['difference'] != 0].copy()
+        # 주문별 행 수 (0이면 그 파일에 없는 주문)
+        self.row_counts1 = order_bincount(self.codes1, len(self.order_keys))
+        self.row_counts2 = order_bincount(self.codes2, len(self.order_keys))
+        self.in_file1 = self.row_counts1 > 0
+        self.in_file2 = self.row_counts2 > 0
+    
+    def get_summary(self) -> Dict[str, int]:
+        """파일 요약 정보"""
+        return {
+            'totalRows1': len(self.df1),
+            'totalRows2': len(self.df2),
+            'totalOrders1': int(self.in_file1.sum()),
+            'totalOrders2': int(self.in_file2.sum()),
+            'commonOrders': int((self.in_file1 & self.in_file2).sum()),
+            'differentOrders': int((self.in_file1 ^ self.in_file2).sum())
+        }
+    
+    def get_exclusive_order_frames(self) -> Dict[str, pd.DataFrame]:
+        """각 파일에만 있는 주문 표 (onlyInFile1, onlyInFile2)"""
+        def build() -> Dict[str, pd.DataFrame]:
+            return {
+                'onlyInFile1': self._build_exclusive_orders(self.df1, self.codes1, self.in_file1 & ~self.in_file2),
+                'onlyInFile2': self._build_exclusive_orders(self.df2, self.codes2, self.in_file2 & ~self.in_file1)
+            }
+        return self._memoize('exclusiveOrders', build)
+    
+    def _build_exclusive_orders(self, df: pd.DataFrame, codes: np.ndarray, selected: np.ndarray) -> pd.DataFrame:
+        """선택된 주문(코드별 bool)들을 주문번호 코드 기준 한 번의 groupby로 집계 (첫 등장 순서)"""
+        # 해당 주문의 행만 추출 (원래 행 순서 유지, 빈 주문번호 -1은 끝에 붙인 False로)
+        positions = np.flatnonzero(np.append(selected, False)[codes])
+        if not len(positions):
+            return pd.DataFrame(columns=EXCLUSIVE_ORDER_COLUMNS)
         
-        # 고객명 추가
-        result = []
-        for _, row in diff_orders.iterrows():
-            order_no = row['orderNo']
-            
-            # 고객명과 상품 수 가져오기
-            customer_name = ""
-            product_count1 = 0
-            product_count2 = 0
-            
-            df1_order = self.df1[self.df1['주문번호'] == order_no]
-            if not df1_order.empty:
-                customer_name = df1_order.iloc[0]['수취인명']
-                product_count1 = len(df1_order)
-            
-            df2_order = self.df2[self.df2['주문번호'] == order_no]
-            if not df2_order.empty:
-                if not customer_name:
-                    customer_name = df2_order.iloc[0]['수취인명']
-                product_count2 = len(df2_order)
-            
-            result.append({
-                'orderNo': str(order_no),
-                'customerName': customer_name,
-                'shippingFee1': float(row['shippingFee1']),
-                'shippingFee2': float(row['shippingFee2']),
-                'difference': float(row['difference']),
-                'productCount1': product_count1,
-                'productCount2': product_count2
-            })
+        df_orders = df.iloc[positions]
+        order_codes = codes[positions]
+        grouped = df_orders.groupby(order_codes, sort=False)
+        
+        # 주문별 첫 행 (빈 수취인명은 JSON으로 보낼 수 있도록 배송비 차이와 같이 '')
+        is_first = ~pd.Series(order_codes).duplicated().to_numpy()
+        first_rows = df_orders[is_first].set_axis(order_codes[is_first])
+        
+        agg = pd.DataFrame({'productCount': grouped.size()})
+        agg['customerName'] = (
+            first_rows['수취인명'].astype(object).fillna('') if '수취인명' in df_orders.columns else ''
+        )
+        agg['totalAmount'] = grouped['판매액'].sum().astype(float) if '판매액' in df_orders.columns else 0
+        # 빈 상품코드는 행 단위 비교와 같이 '' ('nan' 문자열이나 join 오류가 되지 않도록)
+        agg['products'] = (
+            df_orders['상품코드'].astype('string').fillna('').groupby(order_codes, sort=False).agg(', '.join)
+            if '상품코드' in df_orders.columns else ''
+        )
+        agg.index = pd.Index(self.order_keys[agg.index.to_numpy()], name='orderNo')
+        
+        return agg.reset_index()[EXCLUSIVE_ORDER_COLUMNS]
+    
+    def _memory_frames(self) -> Dict[str, pd.DataFrame]:
+        return {'file1': self.df1, 'file2': self.df2}
+    
+    def _shipping_aggregates(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        return (
+            self._aggregate_orders(self.df1, self.codes1, self.row_counts1, '1'),
+            self._aggregate_orders(self.df2, self.codes2, self.row_counts2, '2')
+        )
+    
+    def _aggregate_orders(self, df: pd.DataFrame, codes: np.ndarray, row_counts: np.ndarray, suffix: str) -> pd.DataFrame:
+        """주문번호 코드별 배송비 합계, 행 수, 첫 수취인명
         
-        return sorted(result, key=lambda x: abs(x['difference']), reverse=True)
+        두 파일 모두 같은 주문 인덱스(order_index)로 만들어 합칠 때 다시 해시하지 않는다.
+        이 파일에 없는 주문은 배송비·행 수 0, 수취인명 NaN이다.
+        """
+        names = np.full(len(self.order_keys), np.nan, dtype=object)
+        if '수취인명' in df.columns:
+            valid = codes >= 0
+            order_codes, first = np.unique(codes[valid], return_index=True)
+            names[order_codes] = df['수취인명'].to_numpy(dtype=object)[valid][first]
+        else:
+            names[row_counts > 0] = ''
+        return pd.DataFrame({
+            f'shippingFee{suffix}': order_bincount(codes, len(self.order_keys), df['배송비']),
+            f'productCount{suffix}': row_counts,
+            f'customerName{suffix}': names
+        }, index=self.order_index)
     
     def get_amount_differences(self) -> List[Dict[str, Any]]:
         """금액 필드 차이 분석"""
@@ -161,98 +479,1872 @@ class ExcelComparator:
         
         return result
     
-    def export_differences_to_csv(self) -> bytes:
-        """차이점을 CSV로 내보내기"""
-        shipping_diff = self.get_shipping_differences()
-        df = pd.DataFrame(shipping_diff)
+    def get_numeric_fields(self) -> List[str]:
+        """두 파일에 공통으로 있는 숫자 열 (주문번호 제외)"""
+        self._ensure_all_columns()
+        return common_numeric_fields([self.df1, self.df2])
+    
+    def get_field_difference_frame(
+        self,
+        abs_tol: float = 0.0,
+        rel_tol: float = 0.0,
+        fields: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """공통 주문의 주문별·필드별 합계 차이 (허용 오차를 넘는 것만)
+        
+        |값1 - 값2| > abs_tol + rel_tol * max(|값1|, |값2|) 인 (주문, 필드)만 남긴다.
+        한쪽 파일에만 있는 주문은 get_exclusive_orders에서 따로 보고하므로 제외한다.
+        """
+        numeric_fields = self.get_numeric_fields()
+        fields = numeric_fields if fields is None else [f for f in fields if f in numeric_fields]
+        key = ('fieldDifferences', abs_tol, rel_tol, tuple(fields))
+        return self._memoize(key, lambda: self._build_field_difference_frame(abs_tol, rel_tol, fields))
+    
+    def _build_field_difference_frame(self, abs_tol: float, rel_tol: float, fields: List[str]) -> pd.DataFrame:
+        # 공통 주문(주문번호 순)의 필드별 합계를 주문 코드로 집계해 한 번에 비교
+        common = np.flatnonzero(self.in_file1 & self.in_file2)
+        common_orders = self.order_keys[common]
+        values1 = order_totals(self.df1, self.codes1, len(self.order_keys), fields)[common]
+        values2 = order_totals(self.df2, self.codes2, len(self.order_keys), fields)[common]
+        difference = values1 - values2
+        tolerance = abs_tol + rel_tol * np.maximum(np.abs(values1), np.abs(values2))
+        rows, cols = np.nonzero(np.abs(difference) > tolerance)
+        
+        frame = pd.DataFrame({
+            'orderNo': common_orders[rows],
+            'field': np.asarray(fields, dtype=object)[cols],
+            'value1': values1[rows, cols],
+            'value2': values2[rows, cols],
+            'difference': difference[rows, cols]
+        })
+        return frame.sort_values('difference', key=abs, ascending=False, kind='stable', ignore_index=True)
+    
+    def get_field_differences(
+        self,
+        abs_tol: float = 0.0,
+        rel_tol: float = 0.0,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """주문별·필드별 차이 목록"""
+        return self.get_field_difference_frame(abs_tol, rel_tol, fields).to_dict('records')
+    
+    def get_line_difference_frames(self) -> Dict[str, pd.DataFrame]:
+        """(주문번호, 상품코드, 같은 상품 내 순번) 기준 행 단위 비교
+        
+        파일1을 이전, 파일2를 이후로 보고 changed(값이 바뀐 셀, 필드별 한 행),
+        added(파일2에만 있는 행), removed(파일1에만 있는 행)를 돌려준다.
+        같은 주문에 같은 상품코드가 여러 번 나오면 등장 순서대로 짝을 짓는다.
+        비교하는 필드는 두 파일의 모든 공통 열이다. 분석 열(READ_COLUMNS)만 읽은 세션 비교기는
+        처음 호출할 때 보관한 업로드를 모든 열로 다시 읽는다 (defer_all_columns).
+        """
+        self._ensure_all_columns()
+        return self._memoize('lineDifferences', self._build_line_difference_frames)
+    
+    def _build_line_difference_frames(self) -> Dict[str, pd.DataFrame]:
+        line_keys = ['orderNo', 'productCode', 'occurrence']
+        fields = [
+            column for column in self.df1.columns
+            if column in self.df2.columns and column not in ('주문번호', '상품코드')
+        ]
+        
+        # 상품코드도 두 파일 공통의 정렬된 코드로 (주문번호 코드와 함께 정수로 짝짓고 정렬)
+        products = [
+            df['상품코드'].astype('string').fillna('') if '상품코드' in df.columns
+            else pd.Series('', index=df.index, dtype='string')
+            for df in [self.df1, self.df2]
+        ]
+        product_codes, product_names = pd.factorize(pd.concat(products, ignore_index=True), sort=True)
+        product_codes = [product_codes[:len(self.df1)], product_codes[len(self.df1):]]
+        
+        def line_frame(df: pd.DataFrame, codes: np.ndarray, products: np.ndarray) -> pd.DataFrame:
+            valid = codes >= 0
+            lines = pd.DataFrame({'orderNo': codes[valid], 'productCode': products[valid]})
+            lines['occurrence'] = lines.groupby(['orderNo', 'productCode'], sort=False).cumcount()
+            # category 열은 파일마다 범주가 달라 직접 비교할 수 없으므로 object로
+            values = df.loc[valid, fields].astype({
+                field: object for field in fields if isinstance(df[field].dtype, pd.CategoricalDtype)
+            })
+            return pd.concat([lines, values.set_axis(lines.index)], axis=1)
+        
+        merged = pd.merge(
+            line_frame(self.df1, self.codes1, product_codes[0]),
+            line_frame(self.df2, self.codes2, product_codes[1]),
+            on=line_keys,
+            how='outer',
+            suffixes=('_1', '_2'),
+            indicator=True,
+            sort=True
+        )
+        # 코드를 다시 주문번호·상품코드 문자열로 (코드 순서가 문자열 정렬 순서라 정렬 결과는 같음)
+        merged['orderNo'] = self.order_keys[merged['orderNo'].to_numpy()]
+        merged['productCode'] = np.asarray(product_names, dtype=object)[merged['productCode'].to_numpy()]
+        
+        def side_frame(mask: pd.Series, suffix: str) -> pd.DataFrame:
+            columns = line_keys + [f'{field}{suffix}' for field in fields]
+            return merged.loc[mask, columns].rename(
+                columns={f'{field}{suffix}': field for field in fields}
+            ).reset_index(drop=True)
+        
+        # 양쪽에 모두 있는 행은 필드별로 값이 다른 셀만 모음 (NaN끼리는 같은 값)
+        both = merged[merged['_merge'] == 'both']
+        changed = []
+        for field in fields:
+            value1 = both[f'{field}_1']
+            value2 = both[f'{field}_2']
+            differs = ~((value1 == value2) | (value1.isna() & value2.isna()))
+            if differs.any():
+                changed.append(pd.DataFrame({
+                    'orderNo': both.loc[differs, 'orderNo'],
+                    'productCode': both.loc[differs, 'productCode'],
+                    'occurrence': both.loc[differs, 'occurrence'],
+                    'field': field,
+                    'value1': value1[differs].astype(object),
+                    'value2': value2[differs].astype(object)
+                }))
+        changed_frame = (
+            pd.concat(changed).sort_values(line_keys, kind='stable', ignore_index=True)
+            if changed else pd.DataFrame(columns=line_keys + ['field', 'value1', 'value2'])
+        )
+        
+        return {
+            'changed': changed_frame,
+            'added': side_frame(merged['_merge'] == 'right_only', '_2'),
+            'removed': side_frame(merged['_merge'] == 'left_only', '_1')
+        }
+    
+# 스트리밍 모드에서 한 번에 집계하는 행 수
+STREAM_CHUNK_ROWS = int(os.environ.get('STREAM_CHUNK_ROWS', '50000'))
+
+class OrderAggregates(NamedTuple):
+    orders: pd.DataFrame              # 주문별 집계 (첫 등장 순서, 인덱스는 주문번호 키)
+    columns: List[Any]                # 시트의 전체 열 목록
+    total_rows: int                   # 빈 행을 제외한 데이터 행 수
+    amount_totals: Dict[str, float]   # 금액 열 전체 합계
+
+def _excel_cell_value(value: Any) -> Any:
+    """openpyxl 셀 값을 pandas read_excel과 같은 규칙으로 변환 (빈 셀 -> NaN, 정수형 실수 -> int)"""
+    if value is None or (isinstance(value, str) and value == ''):
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def aggregate_order_rows(df: pd.DataFrame, keys: pd.Series) -> pd.DataFrame:
+    """행 묶음을 주문별로 집계 (productCount, customerName, shippingFee, totalAmount, products)"""
+    grouped = df.groupby(keys, sort=False)
+    orders = pd.DataFrame({
+        'productCount': grouped.size(),
+        'shippingFee': grouped['배송비'].sum()
+    })
+    is_first = ~keys.duplicated() & keys.notna()
+    # 수취인명이 빈 주문은 ''로 (읽은 표 기반 고유 주문 결과와 같게)
+    orders['customerName'] = (
+        df.loc[is_first, '수취인명'].astype(object).set_axis(keys[is_first]).fillna('')
+        if '수취인명' in df.columns else ''
+    )
+    orders['totalAmount'] = grouped['판매액'].sum() if '판매액' in df.columns else 0
+    orders['products'] = (
+        df['상품코드'].astype('string').fillna('').groupby(keys, sort=False).agg(', '.join)
+        if '상품코드' in df.columns else ''
+    )
+    return orders
+
+def _merge_order_aggregates(total: Optional[pd.DataFrame], part: pd.DataFrame) -> pd.DataFrame:
+    """앞선 청크까지의 주문 집계에 새 청크 집계를 합침 (첫 수취인명은 먼저 나온 값 유지)"""
+    if total is None:
+        return part
+    combined = pd.concat([total, part])
+    grouped = combined.groupby(level=0, sort=False)
+    merged = grouped[['productCount', 'shippingFee', 'totalAmount']].sum()
+    merged['customerName'] = combined['customerName'][~combined.index.duplicated()]
+    merged['products'] = grouped['products'].agg(', '.join)
+    return merged
+
+def aggregate_excel_orders(path: Union[str, BinaryIO], chunk_rows: Optional[int] = None) -> OrderAggregates:
+    """xlsx 첫 시트를 read-only 모드로 한 행씩 읽으며 주문별 집계만 유지
+    
+    원본 행은 chunk_rows개씩만 메모리에 두고 바로 주문 집계에 합치므로 메모리 사용량은
+    행 수가 아니라 주문 수에 비례한다. 결과는 read_excel_orders로 읽은 경우와 같다.
+    """
+    import openpyxl
+    
+    chunk_rows = chunk_rows or STREAM_CHUNK_ROWS
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        while header and header[-1] is None:
+            header.pop()
+        columns = [column if column is not None else f'Unnamed: {i}' for i, column in enumerate(header)]
+        
+        positions = {}
+        for i, column in enumerate(columns):
+            if column in ORDER_COLUMNS and column not in positions:
+                positions[column] = i
+        for required in ['주문번호', '배송비']:
+            if required not in positions:
+                raise KeyError(required)
+        amount_fields = [column for column in AMOUNT_COLUMNS if column in positions]
+        
+        orders = None
+        total_rows = 0
+        amount_totals = {field: 0 for field in amount_fields}
+        
+        def flush(chunk: List[Tuple[Any, ...]]):
+            nonlocal orders, total_rows
+            df = pd.DataFrame({
+                column: pd.Series(
+                    [_excel_cell_value(row[i]) if i < len(row) else np.nan for row in chunk],
+                    dtype=object
+                )
+                for column, i in positions.items()
+            })
+            for column in TEXT_COLUMNS:
+                if column in df.columns:
+                    df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+            for column in amount_fields:
+                df[column] = pd.to_numeric(df[column], errors='coerce')
+                amount_totals[column] += df[column].sum()
+            
+            total_rows += len(df)
+            orders = _merge_order_aggregates(orders, aggregate_order_rows(df, normalize_order_keys(df['주문번호'])))
         
-        output = io.StringIO()
-        df.to_csv(output, index=False, encoding='utf-8-sig')
-        return output.getvalue().encode('utf-8-sig')
+        chunk = []
+        for row in rows:
+            # 완전히 빈 행은 read_excel과 마찬가지로 건너뜀
+            if all(value is None or value == '' for value in row):
+                continue
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                flush(chunk)
+                chunk = []
+        if chunk or orders is None:
+            flush(chunk)
+    finally:
+        workbook.close()
+    
+    return OrderAggregates(orders, columns, total_rows, amount_totals)
+
+class AggregatedComparator(OrderComparatorBase):
+    """주문별 집계만으로 비교 (대용량 파일용 스트리밍 모드, 원본 행은 보관하지 않음)
+    
+    요약, 열 비교, 배송비 차이, 금액 합계, 고유 주문을 ExcelComparator와 같은 결과로 제공한다.
+    행 단위·필드별 분석은 원본 행이 필요하므로 지원하지 않는다.
+    """
+    
+    def __init__(
+        self,
+        aggregates1: OrderAggregates,
+        aggregates2: OrderAggregates,
+        shipping: Optional[pd.DataFrame] = None
+    ):
+        """shipping을 주면 배송비 차이 표로 그대로 사용 (증분 갱신한 기준처럼 이미 계산한 경우)"""
+        self.aggregates1 = aggregates1
+        self.aggregates2 = aggregates2
+        self.columns1 = aggregates1.columns
+        self.columns2 = aggregates2.columns
+        self.orders1 = set(aggregates1.orders.index)
+        self.orders2 = set(aggregates2.orders.index)
+        self._reset_memo()
+        if shipping is not None:
+            self._memoize('shippingFee', lambda: shipping)
+    
+    def get_summary(self) -> Dict[str, int]:
+        """파일 요약 정보"""
+        return {
+            'totalRows1': self.aggregates1.total_rows,
+            'totalRows2': self.aggregates2.total_rows,
+            'totalOrders1': len(self.orders1),
+            'totalOrders2': len(self.orders2),
+            'commonOrders': len(self.orders1 & self.orders2),
+            'differentOrders': len(self.orders1 ^ self.orders2)
+        }
+    
+    def get_amount_differences(self) -> List[Dict[str, Any]]:
+        """금액 필드 차이 분석"""
+        totals1 = self.aggregates1.amount_totals
+        totals2 = self.aggregates2.amount_totals
+        return [
+            {
+                'field': field,
+                'sum1': float(totals1[field]),
+                'sum2': float(totals2[field]),
+                'difference': float(totals1[field] - totals2[field])
+            }
+            for field in AMOUNT_COLUMNS
+            if field in totals1 and field in totals2
+        ]
+    
+    def get_exclusive_order_frames(self) -> Dict[str, pd.DataFrame]:
+        """각 파일에만 있는 주문 표 (onlyInFile1, onlyInFile2)"""
+        def exclusive(aggregates: OrderAggregates, order_nos: set) -> pd.DataFrame:
+            if not order_nos:
+                return pd.DataFrame(columns=EXCLUSIVE_ORDER_COLUMNS)
+            orders = aggregates.orders
+            frame = orders[orders.index.isin(order_nos)].copy()
+            if '판매액' in aggregates.columns:
+                frame['totalAmount'] = frame['totalAmount'].astype(float)
+            frame.index.name = 'orderNo'
+            return frame.reset_index()[EXCLUSIVE_ORDER_COLUMNS]
+        
+        return self._memoize('exclusiveOrders', lambda: {
+            'onlyInFile1': exclusive(self.aggregates1, self.orders1 - self.orders2),
+            'onlyInFile2': exclusive(self.aggregates2, self.orders2 - self.orders1)
+        })
+    
+    def _memory_frames(self) -> Dict[str, pd.DataFrame]:
+        return {'file1': self.aggregates1.orders, 'file2': self.aggregates2.orders}
+    
+    def _shipping_aggregates(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        columns = ['shippingFee', 'productCount', 'customerName']
+        return (
+            self.aggregates1.orders[columns].add_suffix('1'),
+            self.aggregates2.orders[columns].add_suffix('2')
+        )
+
+# 증분 비교 기준 저장 위치 (비어 있으면 메모리에만 보관)
+BASELINE_DIR = os.environ.get('BASELINE_DIR', '')
+# 직전 실행 대비 변화 표의 열
+DELTA_COLUMNS = ['orderNo', 'change', 'customerName', 'differenceBefore', 'differenceAfter', 'shippingFee1', 'shippingFee2']
+
+def frame_aggregates(df: pd.DataFrame, columns: List[Any]) -> OrderAggregates:
+    """읽은 주문 표를 주문별 집계로 (스트리밍 집계와 같은 형식)"""
+    df = df.astype({
+        column: object for column in TEXT_COLUMNS
+        if column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype)
+    })
+    orders = aggregate_order_rows(df, normalize_order_keys(df['주문번호']))
+    amount_totals = {column: df[column].sum() for column in AMOUNT_COLUMNS if column in df.columns}
+    return OrderAggregates(orders, columns, len(df), amount_totals)
+
+def changed_orders(old: pd.DataFrame, new: pd.DataFrame) -> Dict[str, pd.Index]:
+    """두 주문별 집계 사이에 추가·삭제·변경된 주문번호"""
+    common = old.index.intersection(new.index)
+    before = old.loc[common]
+    after = new.loc[common, before.columns]
+    same = ((before == after) | (before.isna() & after.isna())).all(axis=1)
+    return {
+        'added': new.index.difference(old.index),
+        'removed': old.index.difference(new.index),
+        'modified': common[~same.to_numpy()]
+    }
+
+def rank_shipping_differences(frame: pd.DataFrame) -> pd.DataFrame:
+    """배송비 차이 표를 전체 계산과 같은 순서로 (차이 절대값 내림차순, 같으면 주문번호순)"""
+    order = frame.assign(_absDifference=frame['difference'].abs()).sort_values(
+        ['_absDifference', 'orderNo'], ascending=[False, True], kind='stable'
+    ).index
+    return frame.loc[order].reset_index(drop=True)
+
+class ComparisonBaseline(NamedTuple):
+    name: str
+    aggregates: Tuple[OrderAggregates, OrderAggregates]  # 두 파일의 주문별 집계
+    digests: Tuple[str, str]                             # 기준이 된 두 파일의 내용 해시
+    shipping: pd.DataFrame                               # 전체 배송비 차이 표
+    delta: pd.DataFrame                                  # 직전 실행 대비 변화 (처음 만들면 빈 표)
+    changed_orders: Dict[str, Dict[str, int]]            # 직전 실행 대비 파일별 추가·삭제·변경 주문 수
+    updated_at: float
+
+def create_baseline(name: str, aggregates: Tuple[OrderAggregates, OrderAggregates], digests: Tuple[str, str]) -> ComparisonBaseline:
+    """두 파일의 주문별 집계로 처음 기준을 만듦 (배송비 차이는 전체 계산)"""
+    comparator = AggregatedComparator(*aggregates)
+    return ComparisonBaseline(
+        name, aggregates, digests, comparator.get_shipping_difference_frame(),
+        pd.DataFrame(columns=DELTA_COLUMNS), {}, time.time()
+    )
+
+def update_baseline(
+    baseline: ComparisonBaseline,
+    updates: Dict[int, Tuple[OrderAggregates, str]]
+) -> ComparisonBaseline:
+    """새 버전 파일의 주문별 집계로 기준을 갱신 (바뀐 주문의 배송비 차이만 다시 계산)
+    
+    updates는 {파일 위치(0, 1): (새 집계, 새 해시)}이며 내용이 같은 파일은 건너뛴다.
+    """
+    aggregates = list(baseline.aggregates)
+    digests = list(baseline.digests)
+    counts = {}
+    affected = pd.Index([], dtype=object)
+    for side, (new_aggregates, digest) in updates.items():
+        if digest == digests[side]:
+            continue
+        changes = changed_orders(aggregates[side].orders, new_aggregates.orders)
+        counts[f'file{side + 1}'] = {kind: len(orders) for kind, orders in changes.items()}
+        for orders in changes.values():
+            affected = affected.union(orders)
+        aggregates[side] = new_aggregates
+        digests[side] = digest
+    
+    # 바뀐 주문만 남긴 집계로 배송비 차이를 계산해 기존 표에 덮어씀
+    def subset(aggregates: OrderAggregates) -> OrderAggregates:
+        return aggregates._replace(orders=aggregates.orders[aggregates.orders.index.isin(affected)])
+    
+    recomputed = AggregatedComparator(*[subset(a) for a in aggregates]).get_shipping_difference_frame()
+    previous = baseline.shipping
+    kept = previous[~previous['orderNo'].isin(affected)]
+    shipping = rank_shipping_differences(pd.concat([kept, recomputed], ignore_index=True))
+    
+    before = previous[previous['orderNo'].isin(affected)].set_index('orderNo')
+    after = recomputed.set_index('orderNo')
+    delta = before[['difference']].join(
+        after[['difference', 'customerName', 'shippingFee1', 'shippingFee2']],
+        how='outer', lsuffix='Before', rsuffix='After'
+    )
+    delta['change'] = np.select(
+        [
+            delta['differenceBefore'].isna(),
+            delta['differenceAfter'].isna(),
+            delta['differenceBefore'] != delta['differenceAfter']
+        ],
+        ['new', 'resolved', 'changed'],
+        default='unchanged'
+    )
+    delta = delta[delta['change'] != 'unchanged']
+    delta.index.name = 'orderNo'
+    
+    return ComparisonBaseline(
+        baseline.name, tuple(aggregates), tuple(digests), shipping,
+        delta.reset_index()[DELTA_COLUMNS], counts, time.time()
+    )
+
+def baseline_comparator(baseline: ComparisonBaseline) -> AggregatedComparator:
+    """기준의 집계로 비교기 생성 (배송비 차이 표는 저장된 결과 사용)"""
+    return AggregatedComparator(*baseline.aggregates, shipping=baseline.shipping)
+
+class BaselineStore:
+    """이름별 증분 비교 기준 저장소 (directory가 있으면 pickle 파일로 남겨 재시작 후에도 유지)"""
+    
+    SUFFIX = '.baseline.pkl'
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._items: Dict[str, ComparisonBaseline] = {}
+        self._lock = threading.Lock()
+        # 읽기-갱신-저장을 한 번에 하나씩 (같은 기준을 동시에 갱신해 변경이 사라지지 않도록)
+        self.update_lock = threading.Lock()
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name + self.SUFFIX)
+    
+    def get(self, name: str) -> Optional[ComparisonBaseline]:
+        with self._lock:
+            baseline = self._items.get(name)
+            if baseline is None and self.directory and os.path.exists(self._path(name)):
+                with open(self._path(name), 'rb') as f:
+                    baseline = pickle.load(f)
+                self._items[name] = baseline
+            return baseline
+    
+    def put(self, baseline: ComparisonBaseline):
+        with self._lock:
+            self._items[baseline.name] = baseline
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                tmp_path = f'{self._path(baseline.name)}.{uuid.uuid4().hex}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(baseline, f, protocol=5)
+                os.replace(tmp_path, self._path(baseline.name))
+    
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            found = self._items.pop(name, None) is not None
+            if self.directory and os.path.exists(self._path(name)):
+                os.unlink(self._path(name))
+                found = True
+            return found
+
+baselines = BaselineStore(BASELINE_DIR)
+
+class MultiExcelComparator(ComparatorBase):
+    """N개 파일을 하나의 주문번호 합집합 인덱스로 비교 (각 파일은 한 번만 읽음)"""
+    
+    def __init__(self, file_paths: List[Union[str, BinaryIO]], parallel: Optional[bool] = None):
+        self._set_frames(*load_order_files(file_paths, parallel=parallel, usecols=None))
+    
+    @classmethod
+    def from_frames(cls, loaded: List[Tuple[pd.DataFrame, List[Any]]]) -> 'MultiExcelComparator':
+        """이미 읽은 (DataFrame, 열 목록) 목록으로 비교기 생성"""
+        comparator = cls.__new__(cls)
+        comparator._set_frames(*loaded)
+        return comparator
+    
+    def _set_frames(self, *loaded: Tuple[pd.DataFrame, List[Any]]):
+        self.frames = [df for df, _ in loaded]
+        self.columns = [columns for _, columns in loaded]
+        self.labels = [f'file{i + 1}' for i in range(len(loaded))]
+        
+        # 모든 파일의 주문번호 합집합을 공통 정수 코드로 (ExcelComparator와 같은 인코딩)
+        self.order_keys, self.codes = factorize_order_keys(
+            [normalize_order_keys(df['주문번호']) for df in self.frames]
+        )
+        self.row_counts = [order_bincount(codes, len(self.order_keys)) for codes in self.codes]
+        self._reset_memo()
+    
+    def _memory_frames(self) -> Dict[str, pd.DataFrame]:
+        return dict(zip(self.labels, self.frames))
+    
+    def get_presence_frame(self) -> pd.DataFrame:
+        """주문별 파일 포함 여부 표 (orderNo, file1..fileN, fileCount)"""
+        def build() -> pd.DataFrame:
+            presence = pd.DataFrame({'orderNo': self.order_keys})
+            for label, row_counts in zip(self.labels, self.row_counts):
+                presence[label] = row_counts > 0
+            presence['fileCount'] = presence[self.labels].sum(axis=1)
+            return presence
+        return self._memoize('presence', build)
+    
+    def get_summary(self) -> Dict[str, Any]:
+        """파일별 행/주문 수와 전체 주문 포함 현황"""
+        presence = self.get_presence_frame()
+        return {
+            'files': [
+                {
+                    'file': label,
+                    'totalRows': len(df),
+                    'totalOrders': int(presence[label].sum())
+                }
+                for label, df in zip(self.labels, self.frames)
+            ],
+            'totalOrders': len(presence),
+            'ordersInAllFiles': int((presence['fileCount'] == len(self.labels)).sum()),
+            'ordersMissingSomewhere': int((presence['fileCount'] < len(self.labels)).sum())
+        }
+    
+    def get_reference_difference_frame(
+        self,
+        reference: int = 0,
+        abs_tol: float = 0.0,
+        rel_tol: float = 0.0
+    ) -> pd.DataFrame:
+        """기준 파일 대비 다른 파일의 주문별·필드별 합계 차이 (허용 오차를 넘는 것만)
+        
+        difference는 (해당 파일 값 - 기준 파일 값)이다.
+        기준 파일과 해당 파일 양쪽에 있는 주문만 비교한다. 포함 여부는 get_presence_frame 참고.
+        """
+        self._ensure_all_columns()
+        key = ('referenceDifferences', reference, abs_tol, rel_tol)
+        return self._memoize(key, lambda: self._build_reference_difference_frame(reference, abs_tol, rel_tol))
+    
+    def _build_reference_difference_frame(self, reference: int, abs_tol: float, rel_tol: float) -> pd.DataFrame:
+        fields = common_numeric_fields(self.frames)
+        
+        # 파일별 주문 코드 합계 (주문 수 x 필드 수, 그 파일에 없는 주문은 NaN)
+        totals = []
+        for df, codes, row_counts in zip(self.frames, self.codes, self.row_counts):
+            values = order_totals(df, codes, len(self.order_keys), fields)
+            values[row_counts == 0] = np.nan
+            totals.append(values)
+        reference_values = totals[reference]
+        
+        parts = []
+        for i, values in enumerate(totals):
+            if i == reference:
+                continue
+            difference = values - reference_values
+            tolerance = abs_tol + rel_tol * np.maximum(np.abs(values), np.abs(reference_values))
+            # NaN(한쪽에 없는 주문)은 비교 결과가 False라 제외됨
+            rows, cols = np.nonzero(np.abs(difference) > tolerance)
+            parts.append(pd.DataFrame({
+                'orderNo': self.order_keys[rows],
+                'field': np.asarray(fields, dtype=object)[cols],
+                'file': self.labels[i],
+                'referenceValue': reference_values[rows, cols],
+                'value': values[rows, cols],
+                'difference': difference[rows, cols]
+            }))
+        
+        if not parts:
+            return pd.DataFrame(columns=['orderNo', 'field', 'file', 'referenceValue', 'value', 'difference'])
+        frame = pd.concat(parts, ignore_index=True)
+        return frame.sort_values('difference', key=abs, ascending=False, kind='stable', ignore_index=True)
+
+# CSV 스트리밍 시 한 번에 인코딩하는 행 수
+CSV_CHUNK_ROWS = 5000
+
+def iter_csv(df: pd.DataFrame, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[bytes]:
+    """BOM과 헤더를 먼저 보내고 이후 행을 청크 단위로 UTF-8 CSV 인코딩"""
+    yield ('\ufeff' + df.iloc[:0].to_csv(index=False)).encode('utf-8')
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=False).encode('utf-8')
+
+def query_frame(
+    df: pd.DataFrame,
+    page: int,
+    page_size: int,
+    sort_by: Optional[str] = None,
+    descending: bool = True,
+    filters: Optional[Dict[str, Optional[str]]] = None
+) -> Dict[str, Any]:
+    """결과 표를 필터(부분 일치) -> 정렬 -> 페이지 순으로 조회"""
+    for column, text in (filters or {}).items():
+        if text:
+            df = df[df[column].astype(str).str.contains(text, regex=False, na=False)]
+    
+    if sort_by == 'absDifference':
+        df = df.sort_values('difference', ascending=not descending, kind='stable', key=abs)
+    elif sort_by:
+        df = df.sort_values(sort_by, ascending=not descending, kind='stable')
+    
+    # 빈 값(NaN)은 JSON null로
+    start = (page - 1) * page_size
+    return {
+        'items': frame_records(df.iloc[start:start + page_size]),
+        'total': len(df),
+        'page': page,
+        'pageSize': page_size
+    }
+
+def timed_chunks(stage: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """청크를 만드는 데 든 시간만 합쳐 단계 지표로 기록 (전송 대기 시간 제외)"""
+    seconds = 0.0
+    iterator = iter(chunks)
+    while True:
+        start = time.perf_counter()
+        chunk = next(iterator, None)
+        seconds += time.perf_counter() - start
+        if chunk is None:
+            break
+        yield chunk
+    metrics.observe('compare_stage_duration_seconds', seconds, stage=stage)
+
+def csv_response(chunks: Iterator[bytes]) -> StreamingResponse:
+    return StreamingResponse(
+        timed_chunks('csvEncode', chunks),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=comparison_result.csv"}
+    )
+
+def parsed_keys(
+    digest: str,
+    sheets: Optional[Union[str, Tuple[str, ...]]],
+    usecols: Optional[List[str]]
+) -> List[Tuple[Any, ...]]:
+    """파싱 캐시 조회 키 (첫 키에 저장, 열을 골라 읽을 때는 모든 열을 읽어 둔 결과도 사용)"""
+    keys = [(digest, sheets, None if usecols is None else tuple(usecols))]
+    if usecols is not None:
+        keys.append((digest, sheets, None))
+    return keys
+
+def load_uploads(
+    uploads: List['PreparedUpload'],
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None,
+    all_columns: bool = False
+) -> List[Tuple[pd.DataFrame, List[Any]]]:
+    """파일 해시 기준으로 캐시된 파싱 결과를 재사용하고 나머지만 읽기 (같은 파일은 한 번만)
+    
+    기본은 분석 열(READ_COLUMNS)만 읽는다. 필드·행 단위 비교처럼 모든 공통 열이 필요할 때만
+    all_columns로 모든 열을 읽는다 (defer_uploads_all_columns).
+    """
+    # 시트는 엑셀에서만 고를 수 있음 (CSV, Parquet에서 조용히 무시하지 않도록)
+    if sheets is not None:
+        not_excel = [upload.filename for upload in uploads if upload.file_format not in ('xlsx', 'xls')]
+        if not_excel:
+            raise HTTPException(
+                status_code=400,
+                detail=f"시트는 엑셀 파일에서만 고를 수 있습니다: {', '.join(not_excel)}"
+            )
+    
+    usecols = None if all_columns else READ_COLUMNS
+    keys = {upload.digest: parsed_keys(upload.digest, sheets, usecols) for upload in uploads}
+    by_digest = {upload.digest: upload for upload in uploads}
+    use_cache = not is_profiling()
+    
+    def cached(cache, digest: str) -> Optional[Tuple[pd.DataFrame, List[Any]]]:
+        for key in keys[digest]:
+            frames = cache.get(key)
+            if frames is not None:
+                return frames
+        return None
+    
+    loaded = {digest: cached(parsed_cache, digest) if use_cache else None for digest in by_digest}
+    
+    metrics.inc('compare_parsed_files_total', sum(frames is not None for frames in loaded.values()), source='memory')
+    
+    # 메모리에 없으면 디스크 캐시(이전 실행에서 변환한 Arrow 파일)에서
+    for digest, frames in loaded.items():
+        if frames is None and disk_cache.enabled and use_cache:
+            with timed('diskCacheRead'):
+                frames = cached(disk_cache, digest)
+            if frames is not None:
+                metrics.inc('compare_parsed_files_total', source='disk')
+                parsed_cache.put(keys[digest][0], frames)
+                loaded[digest] = frames
+    
+    missing = [digest for digest, frames in loaded.items() if frames is None]
+    if missing:
+        with timed('parse'):
+            try:
+                parsed = load_order_files(
+                    [by_digest[d].source for d in missing],
+                    file_formats=[by_digest[d].file_format for d in missing],
+                    sheets=sheets,
+                    usecols=usecols
+                )
+            except SheetNotFoundError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        for digest, frames in zip(missing, parsed):
+            metrics.inc('compare_parsed_files_total', source='parse')
+            metrics.inc('compare_parsed_rows_total', len(frames[0]))
+            parsed_cache.put(keys[digest][0], frames)
+            if disk_cache.enabled:
+                with timed('diskCacheWrite'):
+                    disk_cache.put(keys[digest][0], frames)
+            loaded[digest] = frames
+    
+    return [loaded[upload.digest] for upload in uploads]
+
+def defer_uploads_all_columns(
+    comparator: ComparatorBase,
+    uploads: List['PreparedUpload'],
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+):
+    """세션에 남길 비교기가 모든 열이 필요한 분석을 처음 할 때 업로드를 모든 열로 다시 읽도록 연결
+    
+    업로드는 요청이 끝나면 지우므로 따로 보관하고, 다시 읽은 뒤나 비교기가 사라질 때 지운다.
+    다시 읽을 때도 파싱 캐시(메모리·디스크)의 모든 열 결과를 먼저 찾는다.
+    """
+    kept = [keep_upload(upload) for upload in uploads]
+    remove_kept = weakref.finalize(comparator, remove_kept_uploads, kept)
+    
+    def load() -> List[Tuple[pd.DataFrame, List[Any]]]:
+        loaded = load_uploads(kept, sheets, all_columns=True)
+        remove_kept()
+        return loaded
+    
+    comparator.defer_all_columns(load)
+
+def load_comparator(
+    upload1: 'PreparedUpload',
+    upload2: 'PreparedUpload',
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None,
+    for_session: bool = False
+) -> ExcelComparator:
+    """파일 해시 기준으로 캐시된 파싱 결과를 재사용해 비교기 생성
+    
+    분석 열만 읽는다. 세션에 남길 비교기(for_session)는 필드·행 단위 비교 때 모든 열을 읽도록 업로드를 보관한다.
+    """
+    loaded = load_uploads([upload1, upload2], sheets)
+    with timed('index'):
+        comparator = ExcelComparator.from_frames(*loaded)
+    if for_session:
+        defer_uploads_all_columns(comparator, [upload1, upload2], sheets)
+    return comparator
+
+# 이 크기(MB) 이상인 xlsx 업로드는 자동으로 스트리밍 집계 모드로 비교 (0이면 요청할 때만)
+STREAMING_THRESHOLD_MB = float(os.environ.get('STREAMING_THRESHOLD_MB', '0'))
+
+def use_streaming(uploads: List['PreparedUpload'], requested: bool) -> bool:
+    """스트리밍 집계 모드 사용 여부 (read-only 행 읽기는 xlsx만 지원)"""
+    if not all(upload.file_format == 'xlsx' for upload in uploads):
+        return False
+    if requested:
+        return True
+    threshold = STREAMING_THRESHOLD_MB * 1024 * 1024
+    return threshold > 0 and any(upload.size >= threshold for upload in uploads)
+
+def load_aggregates(upload: 'PreparedUpload') -> OrderAggregates:
+    """파일 해시 기준으로 캐시된 스트리밍 집계를 재사용하고 없으면 새로 집계"""
+    key = ('aggregates', upload.digest)
+    aggregates = parsed_cache.get(key)
+    if aggregates is None:
+        aggregates = aggregate_excel_orders(upload.source)
+        parsed_cache.put(key, aggregates)
+    return aggregates
+
+def load_aggregated_comparator(upload1: 'PreparedUpload', upload2: 'PreparedUpload') -> AggregatedComparator:
+    return AggregatedComparator(load_aggregates(upload1), load_aggregates(upload2))
+
+def _compare_multi_files(
+    uploads: List['PreparedUpload'],
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+) -> Dict[str, Any]:
+    comparator = MultiExcelComparator.from_frames(load_uploads(uploads, sheets))
+    defer_uploads_all_columns(comparator, uploads, sheets)
+    session_id = sessions.create(comparator)
+    return {
+        'summary': comparator.get_summary(),
+        'sessionId': session_id,
+        'sessionTtl': SESSION_TTL_SECONDS
+    }
+
+def _compare_files(
+    upload1: 'PreparedUpload',
+    upload2: 'PreparedUpload',
+    limit: Optional[int] = None,
+    summary_only: bool = False,
+    streaming: bool = False,
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+) -> Dict[str, Any]:
+    # 스트리밍 집계는 첫 시트만 읽으므로 시트를 고르면 일반 모드
+    if sheets is None and use_streaming([upload1, upload2], streaming):
+        comparator = load_aggregated_comparator(upload1, upload2)
+    else:
+        comparator = load_comparator(upload1, upload2, sheets, for_session=True)
+    session_id = sessions.create(comparator)
+    
+    # 스트리밍 집계와 일반 모드의 결과가 같으므로 캐시 키는 공유
+    # 캐시에는 응답 레코드 대신 섹션 표를 두어 크기를 memory_usage로 재고 요약·전체 응답이 함께 씀
+    if summary_only:
+        limit = None
+    key = ('compare', upload1.digest, upload2.digest, limit, sheets)
+    sections = result_cache.get(key) if not is_profiling() else None
+    if sections is None:
+        sections = comparator.compare_sections(limit)
+        result_cache.put(key, sections)
+    return {**render_comparison(sections, summary_only), 'sessionId': session_id, 'sessionTtl': SESSION_TTL_SECONDS}
+
+def _export_files(
+    upload1: 'PreparedUpload',
+    upload2: 'PreparedUpload',
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+) -> pd.DataFrame:
+    key = ('shippingFrame', upload1.digest, upload2.digest, sheets)
+    frame = result_cache.get(key) if not is_profiling() else None
+    if frame is None:
+        comparator = load_comparator(upload1, upload2, sheets)
+        with timed('shippingFee'):
+            frame = comparator.get_shipping_difference_frame()
+        result_cache.put(key, frame)
+    return frame
+
+def _export_csv_bytes(
+    upload1: 'PreparedUpload',
+    upload2: 'PreparedUpload',
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+) -> bytes:
+    """CSV 인코딩까지 한 번에 (프로파일링할 때 인코딩 시간도 포함하도록)"""
+    return b''.join(iter_csv(_export_files(upload1, upload2, sheets)))
+
+def baseline_response(baseline: ComparisonBaseline, comparator: AggregatedComparator) -> Dict[str, Any]:
+    """기준 생성·갱신 응답 (요약 형식 비교 결과 + 직전 실행 대비 변화 건수)"""
+    session_id = sessions.create(comparator)
+    return {
+        **comparator.compare(summary_only=True),
+        'baseline': baseline.name,
+        'updatedAt': baseline.updated_at,
+        'changedOrders': baseline.changed_orders,
+        'deltaCounts': baseline.delta['change'].value_counts().to_dict(),
+        'sessionId': session_id,
+        'sessionTtl': SESSION_TTL_SECONDS
+    }
+
+def _create_baseline(
+    name: str,
+    upload1: 'PreparedUpload',
+    upload2: 'PreparedUpload',
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+) -> Dict[str, Any]:
+    loaded1, loaded2 = load_uploads([upload1, upload2], sheets)
+    baseline = create_baseline(
+        name, (frame_aggregates(*loaded1), frame_aggregates(*loaded2)), (upload1.digest, upload2.digest)
+    )
+    # 같은 이름을 갱신 중이면 그 읽기-갱신-저장이 끝난 뒤에 덮어씀
+    with baselines.update_lock:
+        baselines.put(baseline)
+    return baseline_response(baseline, baseline_comparator(baseline))
+
+def _update_baseline(
+    name: str,
+    uploads: Dict[int, 'PreparedUpload'],
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+) -> Dict[str, Any]:
+    if baselines.get(name) is None:
+        raise HTTPException(status_code=404, detail=f"비교 기준이 없습니다: {name}")
+    # 파싱과 집계는 잠금 밖에서
+    updates = {
+        side: (frame_aggregates(*load_uploads([upload], sheets)[0]), upload.digest)
+        for side, upload in uploads.items()
+    }
+    with baselines.update_lock:
+        # 파싱하는 동안 삭제되었을 수 있으므로 잠근 뒤 다시 확인
+        baseline = baselines.get(name)
+        if baseline is None:
+            raise HTTPException(status_code=404, detail=f"비교 기준이 없습니다: {name}")
+        baseline = update_baseline(baseline, updates)
+        baselines.put(baseline)
+    return baseline_response(baseline, baseline_comparator(baseline))
+
+def get_session_comparator(session_id: str, comparator_type: type = ExcelComparator) -> Any:
+    """세션에 저장된 비교기 (없거나 만료되면 404, 다른 종류의 세션이면 400)"""
+    comparator = sessions.get(session_id)
+    if comparator is None:
+        raise HTTPException(status_code=404, detail="비교 세션이 없거나 만료되었습니다. 파일을 다시 비교해주세요.")
+    if not isinstance(comparator, comparator_type):
+        raise HTTPException(status_code=400, detail="이 세션에서는 지원하지 않는 조회입니다.")
+    return comparator
+
+# 업로드 청크 크기 (임시 파일 기록 시)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+class PreparedUpload(NamedTuple):
+    source: Union[str, BinaryIO]  # 파싱 입력 (업로드 버퍼 또는 임시 파일 경로)
+    tmp_path: Optional[str]       # 삭제할 임시 파일 경로
+    digest: str                   # 업로드 내용의 SHA-256
+    filename: str                 # 업로드 파일 이름
+    size: int                     # 업로드 크기 (바이트)
+    file_format: Optional[str]    # 판별한 형식 ('xlsx', 'xls', 'csv', 'parquet')
+
+def check_upload_format(file: UploadFile):
+    """확장자로 지원하는 형식인지 확인 (실제 형식은 prepare_upload에서 내용으로 다시 판별)"""
+    if detect_file_format(file.filename or '') is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"엑셀(xlsx, xls), CSV, Parquet 파일만 지원됩니다: {file.filename}"
+        )
+
+def check_uploads(files: List[UploadFile]):
+    """업로드를 읽기 전에 형식과 작업 한도를 확인 (한도가 차면 업로드를 해시·복사하기 전에 바로 503)"""
+    for file in files:
+        check_upload_format(file)
+    check_job_capacity()
+
+def parse_sheets(sheets: Optional[str]) -> Optional[Union[str, Tuple[str, ...]]]:
+    """sheets 쿼리 값 해석: 없으면 첫 시트, '*'이면 모든 시트, 쉼표 구분 이름이면 해당 시트"""
+    if sheets is None or not sheets.strip():
+        return None
+    if sheets.strip() == '*':
+        return '*'
+    return tuple(name.strip() for name in sheets.split(',') if name.strip())
+
+def sheet_selection(
+    sheets: Optional[str] = Query(None, description="읽을 엑셀 시트 (쉼표 구분 이름, '*'이면 모든 시트, 기본은 첫 시트)")
+) -> Optional[Union[str, Tuple[str, ...]]]:
+    """파일을 읽는 엔드포인트 공용 sheets 쿼리 (parse_sheets로 해석한 값을 전달)"""
+    return parse_sheets(sheets)
+
+def profile_token(
+    profile: Optional[str] = Query(None, description="관리자 프로파일링 토큰 (X-Profile-Token 헤더로도 전달 가능)"),
+    profile_header: Optional[str] = Header(None, alias="X-Profile-Token")
+) -> Optional[str]:
+    """프로파일링 엔드포인트 공용 관리자 토큰 (헤더를 쿼리보다 우선)"""
+    return profile_header or profile
+
+async def prepare_upload(file: UploadFile, to_disk: bool = False) -> PreparedUpload:
+    """업로드를 파싱 입력으로 준비하고 내용 해시를 계산
+    
+    순차 로드는 스풀된 업로드 버퍼를 그대로 읽고, 병렬 로드는 워커 프로세스에
+    경로를 넘겨야 하므로 전체를 메모리에 올리지 않고 청크 단위로 임시 파일에 기록한다.
+    요청이 끝난 뒤에도 읽어야 하면(백그라운드 작업) to_disk로 항상 임시 파일에 기록한다.
+    """
+    with timed('upload'):
+        upload = await _prepare_upload(file, to_disk)
+    metrics.inc('compare_upload_bytes_total', upload.size)
+    return upload
+
+async def _prepare_upload(file: UploadFile, to_disk: bool) -> PreparedUpload:
+    digest = hashlib.sha256()
+    size = 0
+    await file.seek(0)
+    filename = file.filename or ''
+    file_format = detect_file_format(filename, await file.read(8))
+    await file.seek(0)
+    
+    if not (PARALLEL_LOAD or to_disk):
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+        await file.seek(0)
+        return PreparedUpload(file.file, None, digest.hexdigest(), filename, size, file_format)
+    
+    suffix = os.path.splitext(filename)[1] or '.xlsx'
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+            tmp.write(chunk)
+    return PreparedUpload(tmp.name, tmp.name, digest.hexdigest(), filename, size, file_format)
+
+def cleanup_uploads(uploads: List[PreparedUpload]):
+    """prepare_upload로 만든 임시 파일 삭제"""
+    for upload in uploads:
+        if upload.tmp_path is not None:
+            os.unlink(upload.tmp_path)
+
+def keep_upload(upload: PreparedUpload) -> PreparedUpload:
+    """요청이 끝난 뒤에도 다시 읽을 수 있게 업로드를 별도 임시 파일로 보관 (임시 파일이면 하드 링크)"""
+    suffix = os.path.splitext(upload.filename)[1] or '.xlsx'
+    path = os.path.join(tempfile.gettempdir(), f'compare-orders-{uuid.uuid4().hex}{suffix}')
+    with timed('keepUpload'):
+        if upload.tmp_path is not None:
+            try:
+                os.link(upload.tmp_path, path)
+            except OSError:
+                shutil.copyfile(upload.tmp_path, path)
+        else:
+            upload.source.seek(0)
+            with open(path, 'wb') as f:
+                shutil.copyfileobj(upload.source, f, UPLOAD_CHUNK_SIZE)
+            upload.source.seek(0)
+    return upload._replace(source=path, tmp_path=path)
+
+def remove_kept_uploads(uploads: List[PreparedUpload]):
+    """keep_upload로 보관한 파일 삭제 (이미 지워졌으면 무시)"""
+    for upload in uploads:
+        try:
+            os.unlink(upload.tmp_path)
+        except FileNotFoundError:
+            pass
+
+# 일괄 비교 설정 (쌍별 비교는 비교 작업 실행기에서 실행하고, 배치 하나가 동시에 돌리는 쌍은 BATCH_WORKERS개까지)
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', '2'))
+MAX_BATCH_PAIRS = int(os.environ.get('MAX_BATCH_PAIRS', '100'))
+# 압축 해제 후 총 크기 상한 (MB)
+MAX_BATCH_EXTRACT_MB = int(os.environ.get('MAX_BATCH_EXTRACT_MB', '2048'))
+# 아카이브 안에서 찾는 매니페스트 파일 이름
+MANIFEST_NAMES = ['manifest.csv', 'manifest.json']
+
+batches = SessionStore(SESSION_TTL_SECONDS, int(os.environ.get('MAX_BATCHES', '5')))
+
+class BatchPair(NamedTuple):
+    name: str   # 결과에 표시할 쌍 이름
+    file1: str  # 아카이브(또는 업로드) 안의 상대 경로
+    file2: str
+
+class BatchResult(NamedTuple):
+    items: List[Dict[str, Any]]                      # 쌍별 요약 (응답 형식)
+    frames: List[Optional[Dict[str, pd.DataFrame]]]  # 쌍별 상세 결과 표 (실패한 쌍은 None)
+
+def parse_manifest(path: str) -> List[BatchPair]:
+    """매니페스트(CSV 또는 JSON)에서 비교할 파일 쌍 목록 읽기
+    
+    CSV는 file1, file2 (선택: name) 열, JSON은 {"file1", "file2", "name"} 객체 목록이다.
+    """
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8-sig') as f:
+            rows = json.load(f)
+    else:
+        rows = pd.read_csv(path, dtype=str, encoding='utf-8-sig').fillna('').to_dict('records')
+    
+    pairs = []
+    for row in rows:
+        file1, file2 = str(row.get('file1', '')).strip(), str(row.get('file2', '')).strip()
+        if not file1 or not file2:
+            raise HTTPException(status_code=400, detail="매니페스트의 각 행에는 file1, file2가 있어야 합니다.")
+        file1, file2 = [os.path.normpath(name).replace(os.sep, '/') for name in [file1, file2]]
+        name = str(row.get('name') or '').strip() or os.path.splitext(os.path.basename(file1))[0]
+        pairs.append(BatchPair(name, file1, file2))
+    return pairs
+
+def pairs_from_directories(names: List[str]) -> List[BatchPair]:
+    """매니페스트가 없으면 주문 파일이 정확히 2개인 폴더를 한 쌍으로 (이름순으로 file1, file2)"""
+    by_directory: Dict[str, List[str]] = {}
+    for name in sorted(names):
+        by_directory.setdefault(os.path.dirname(name), []).append(name)
+    return [
+        BatchPair(directory or 'root', *files)
+        for directory, files in sorted(by_directory.items())
+        if len(files) == 2
+    ]
+
+def extract_batch_archive(archive: BinaryIO, target_dir: str) -> List[str]:
+    """zip 아카이브를 풀고 풀린 파일의 상대 경로 목록 반환 (경로 탈출, 과도한 크기는 거부)"""
+    try:
+        zf = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="zip 아카이브만 지원됩니다.")
+    
+    with zf:
+        members = [
+            info for info in zf.infolist()
+            if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+        ]
+        if sum(info.file_size for info in members) > MAX_BATCH_EXTRACT_MB * 1024 * 1024:
+            raise HTTPException(status_code=400, detail=f"압축 해제 크기가 {MAX_BATCH_EXTRACT_MB}MB를 넘습니다.")
+        
+        names = []
+        for info in members:
+            name = os.path.normpath(info.filename).replace(os.sep, '/')
+            if name.startswith(('/', '../')) or name == '..':
+                raise HTTPException(status_code=400, detail=f"잘못된 아카이브 경로입니다: {info.filename}")
+            path = os.path.join(target_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with zf.open(info) as src, open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+            names.append(name)
+    return names
+
+def prepare_file(path: str) -> PreparedUpload:
+    """디스크에 있는 파일을 업로드와 같은 형태로 준비 (내용 해시로 캐시 공유)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        head = f.read(8)
+        digest.update(head)
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return PreparedUpload(
+        path, None, digest.hexdigest(), os.path.basename(path),
+        os.path.getsize(path), detect_file_format(path, head)
+    )
+
+def _compare_batch_pair(
+    pair: BatchPair,
+    upload1: PreparedUpload,
+    upload2: PreparedUpload,
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+) -> Tuple[Dict[str, Any], Optional[Dict[str, pd.DataFrame]]]:
+    """한 쌍을 비교해 (요약, 상세 결과 표) 반환 (실패해도 나머지 쌍은 계속 진행)"""
+    item = {'name': pair.name, 'file1': pair.file1, 'file2': pair.file2}
+    try:
+        comparator = load_comparator(upload1, upload2, sheets)
+        result = comparator.compare(summary_only=True)
+        frames = {
+            'shippingFee': comparator.get_shipping_difference_frame(),
+            **comparator.get_exclusive_order_frames()
+        }
+    except Exception as e:
+        return {**item, 'status': 'error', 'error': str(e)}, None
+    return {**item, 'status': 'ok', **result}, frames
+
+def _prepare_batch(
+    target_dir: str,
+    names: List[str],
+    manifest_path: Optional[str] = None
+) -> Tuple[List[BatchPair], Dict[str, PreparedUpload]]:
+    """준비된 디렉터리에서 비교할 파일 쌍과 파일별 업로드(해시 포함)를 구성"""
+    if manifest_path is None:
+        manifest_path = next(
+            (os.path.join(target_dir, name) for name in names if os.path.basename(name).lower() in MANIFEST_NAMES),
+            None
+        )
+    if manifest_path is not None:
+        pairs = parse_manifest(manifest_path)
+    else:
+        pairs = pairs_from_directories([name for name in names if detect_file_format(name) is not None])
+    
+    if not pairs:
+        raise HTTPException(
+            status_code=400,
+            detail="비교할 파일 쌍이 없습니다. 매니페스트를 넣거나 폴더마다 파일 2개를 넣어주세요."
+        )
+    if len(pairs) > MAX_BATCH_PAIRS:
+        raise HTTPException(status_code=400, detail=f"한 번에 비교할 수 있는 쌍은 {MAX_BATCH_PAIRS}개까지입니다.")
+    
+    # 같은 파일이 여러 쌍에 나와도 해시는 한 번만
+    uploads: Dict[str, PreparedUpload] = {}
+    for pair in pairs:
+        for name in [pair.file1, pair.file2]:
+            if name in uploads:
+                continue
+            path = os.path.join(target_dir, name)
+            if name not in names or not os.path.isfile(path):
+                raise HTTPException(status_code=400, detail=f"매니페스트의 파일을 찾을 수 없습니다: {name}")
+            uploads[name] = prepare_file(path)
+    return pairs, uploads
+
+async def _compare_batch(
+    pairs: List[BatchPair],
+    uploads: Dict[str, PreparedUpload],
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+) -> Dict[str, Any]:
+    """파일 쌍들을 비교 작업 실행기에서 비교하고 결과를 배치로 저장
+    
+    쌍마다 실행 중인 작업 수에 포함되어(run_admitted) 다른 비교 요청과 같은 CPU 한도를 나눠 쓴다.
+    한 배치가 동시에 돌리는 쌍은 BATCH_WORKERS개까지다.
+    """
+    running = asyncio.Semaphore(BATCH_WORKERS)
+    
+    async def compare_pair(pair: BatchPair) -> Tuple[Dict[str, Any], Optional[Dict[str, pd.DataFrame]]]:
+        async with running:
+            return await run_admitted(_compare_batch_pair, pair, uploads[pair.file1], uploads[pair.file2], sheets)
+    
+    results = await asyncio.gather(*[compare_pair(pair) for pair in pairs])
+    items = [item for item, _ in results]
+    batch_id = batches.create(BatchResult(items, [frames for _, frames in results]))
+    return {
+        'batchId': batch_id,
+        'batchTtl': SESSION_TTL_SECONDS,
+        'counts': {
+            'total': len(items),
+            'ok': sum(item['status'] == 'ok' for item in items),
+            'error': sum(item['status'] == 'error' for item in items)
+        },
+        'pairs': items
+    }
+
+def batch_summary_frame(items: List[Dict[str, Any]]) -> pd.DataFrame:
+    """쌍별 요약을 한 행씩 펼친 표 (일괄 결과 zip의 summary.csv)"""
+    rows = []
+    for item in items:
+        row = {key: item.get(key) for key in ['name', 'file1', 'file2', 'status', 'error']}
+        row.update(item.get('summary', {}))
+        if 'differences' in item:
+            row['shippingFeeCount'] = item['differences']['shippingFeeCount']
+        row.update(item.get('exclusiveOrderCounts', {}))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def write_batch_archive(batch: BatchResult, target: BinaryIO):
+    """일괄 비교 결과를 zip으로 기록 (summary.csv + 쌍별 폴더의 상세 CSV)"""
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('summary.csv', b''.join(iter_csv(batch_summary_frame(batch.items))))
+        for index, (item, frames) in enumerate(zip(batch.items, batch.frames), start=1):
+            if frames is None:
+                continue
+            # 쌍 이름이 겹치거나 경로 문자가 있어도 폴더가 섞이지 않도록 순번을 붙임
+            folder = f"{index:03d}_{item['name'].replace('/', '_')}"
+            for section, frame in frames.items():
+                zf.writestr(f'{folder}/{section}.csv', b''.join(iter_csv(frame)))
+
+def iter_file(f: BinaryIO) -> Iterator[bytes]:
+    """파일을 청크 단위로 읽어 보내고 끝나면 닫기"""
+    try:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+    finally:
+        f.close()
+
+COMPARE_JOB_STAGES = ['parseFile1', 'parseFile2', 'summary', 'columnComparison', 'amounts', 'shippingFee', 'exclusiveOrders']
+
+def _run_compare_job(
+    job: Job,
+    upload1: PreparedUpload,
+    upload2: PreparedUpload,
+    limit: Optional[int] = None,
+    summary_only: bool = False,
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+) -> Dict[str, Any]:
+    """파일별 파싱과 분석 섹션을 단계로 나눠 진행 상황을 남기며 비교 (결과는 /api/compare와 같은 형식)"""
+    job.advance('parseFile1')
+    loaded1, = load_uploads([upload1], sheets)
+    job.advance('parseFile2')
+    loaded2, = load_uploads([upload2], sheets)
+    
+    comparator = ExcelComparator.from_frames(loaded1, loaded2)
+    defer_uploads_all_columns(comparator, [upload1, upload2], sheets)
+    # compare()와 같은 경로로 섹션마다 단계를 넘기며 한 번씩만 계산
+    sections = comparator.compare_sections(None if summary_only else limit, on_stage=job.advance)
+    result = render_comparison(sections, summary_only)
+    session_id = sessions.create(comparator)
+    return {**result, 'sessionId': session_id, 'sessionTtl': SESSION_TTL_SECONDS}
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    shutdown_job_executor()
+    shutdown_load_pool()
 
 @app.get("/")
 def read_root():
     return {"message": "Excel Compare API", "version": "1.0.0"}
 
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """파싱/결과 캐시, 디스크 캐시, 세션 저장소의 사용량과 히트/미스 통계"""
+    return {
+        **{cache.name: cache.stats() for cache in [parsed_cache, result_cache]},
+        'disk': disk_cache.stats(),
+        'sessions': sessions.stats()
+    }
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus 형식 지표 (요청·단계별 지연 시간, 처리 행·바이트 수, 동시 요청·작업 수, 캐시 사용량)"""
+    metrics.set('compare_pending_jobs', pending_jobs())
+    for cache in [parsed_cache, result_cache]:
+        stats = cache.stats()
+        metrics.set('compare_cache_bytes', stats['bytes'], cache=cache.name)
+        # 캐시의 누적 히트·미스 수를 그대로 카운터 값으로
+        metrics.set('compare_cache_hits_total', stats['hits'], cache=cache.name)
+        metrics.set('compare_cache_misses_total', stats['misses'], cache=cache.name)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/compare")
 async def compare_excel_files(
     file1: UploadFile = File(...),
-    file2: UploadFile = File(...)
+    file2: UploadFile = File(...),
+    limit: Optional[int] = Query(None, ge=1, description="배송비 차이 상위 N건만 반환"),
+    summary_only: bool = Query(False, alias="summaryOnly", description="요약만 반환 (목록은 세션 조회 API 사용)"),
+    streaming: bool = Query(False, description="주문별 집계만 유지하는 스트리밍 모드 (대용량 xlsx용)"),
+    sheets: Optional[Union[str, Tuple[str, ...]]] = Depends(sheet_selection),
+    profile: Optional[str] = Depends(profile_token)
 ):
-    """두 엑셀 파일을 비교"""
+    """두 주문 파일(엑셀, CSV, Parquet)을 비교
     
-    # 파일 확장자 검증
-    for file in [file1, file2]:
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            raise HTTPException(status_code=400, detail=f"엑셀 파일만 지원됩니다: {file.filename}")
+    profile 쿼리 또는 X-Profile-Token 헤더에 관리자 토큰을 주면 캐시 없이 프로파일링하며 실행하고
+    응답의 profile에 상위 함수와 flame graph용 스택 주소를 담는다.
+    """
+    profiling = check_profile_request(profile)
     
-    # 임시 파일로 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp1:
-        content1 = await file1.read()
-        tmp1.write(content1)
-        tmp1_path = tmp1.name
+    # 파일 확장자, 작업 한도 확인
+    check_uploads([file1, file2])
     
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp2:
-        content2 = await file2.read()
-        tmp2.write(content2)
-        tmp2_path = tmp2.name
+    # 업로드 준비 (필요할 때만 청크 단위 임시 파일)
+    upload1, upload2 = [await prepare_upload(file) for file in [file1, file2]]
     
     try:
         # 비교 실행
-        comparator = ExcelComparator(tmp1_path, tmp2_path)
-        
-        result = {
-            'summary': comparator.get_summary(),
-            'columnComparison': comparator.get_column_comparison(),
-            'differences': {
-                'shippingFee': comparator.get_shipping_differences(),
-                'amounts': comparator.get_amount_differences()
-            },
-            'exclusiveOrders': comparator.get_exclusive_orders()
-        }
-        
-        return result
+        options = dict(limit=limit, summary_only=summary_only, streaming=streaming, sheets=sheets)
+        if profiling:
+            result, report = await run_blocking(run_profiled, _compare_files, upload1, upload2, **options)
+            result = {**result, 'profile': report}
+        else:
+            result = await run_blocking(_compare_files, upload1, upload2, **options)
+        with timed('serialize'):
+            return JSONResponse(jsonable_encoder(result))
+    
+    except HTTPException:
+        raise
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
     finally:
         # 임시 파일 삭제
-        os.unlink(tmp1_path)
-        os.unlink(tmp2_path)
+        cleanup_uploads([upload1, upload2])
+
+def comparison_sections(comparator: ExcelComparator, limit: Optional[int] = None) -> List[Tuple[str, Any]]:
+    """스트리밍 응답의 섹션 순서와 응답 형식으로 계산하는 함수 (compare()와 같은 단계)"""
+    return [
+        (section, lambda compute=compute: section_data(compute()))
+        for section, compute in comparator.comparison_stages(limit)
+    ]
+
+def ndjson_line(section: str, data: Any) -> bytes:
+    """NDJSON 한 줄 (NaN은 section_data에서 null로 바꿔 두므로 표준 JSON만 허용)"""
+    return (json.dumps({'section': section, 'data': data}, ensure_ascii=False, allow_nan=False) + '\n').encode('utf-8')
+
+@app.post("/api/compare/stream")
+async def compare_excel_files_stream(
+    file1: UploadFile = File(...),
+    file2: UploadFile = File(...),
+    limit: Optional[int] = Query(None, ge=1, description="배송비 차이 상위 N건만 반환"),
+    sheets: Optional[Union[str, Tuple[str, ...]]] = Depends(sheet_selection)
+):
+    """두 주문 파일을 비교하고 섹션이 계산되는 대로 NDJSON 한 줄씩 전송
+    
+    각 줄은 {"section": 이름, "data": 결과} 형식이며 session, summary, columnComparison,
+    amounts, shippingFee, exclusiveOrders 순서로 보낸 뒤 done으로 끝난다.
+    중간에 실패하면 error 섹션에 오류 메시지를 담아 보내고 종료한다.
+    """
+    check_uploads([file1, file2])
+    
+    upload1, upload2 = [await prepare_upload(file) for file in [file1, file2]]
+    
+    try:
+        # 파싱은 응답 전에 끝내고 업로드 정리 (이후 섹션은 비교기만 사용)
+        comparator = await run_blocking(load_comparator, upload1, upload2, sheets, for_session=True)
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    finally:
+        cleanup_uploads([upload1, upload2])
+    
+    session_id = sessions.create(comparator)
+    
+    async def stream_sections():
+        yield ndjson_line('session', {'sessionId': session_id, 'sessionTtl': SESSION_TTL_SECONDS})
+        try:
+            for section, compute in comparison_sections(comparator, limit=limit):
+                yield ndjson_line(section, await run_blocking(timed(section)(compute)))
+        except HTTPException as e:
+            yield ndjson_line('error', e.detail)
+            return
+        except Exception as e:
+            yield ndjson_line('error', str(e))
+            return
+        yield ndjson_line('done', None)
+    
+    return StreamingResponse(stream_sections(), media_type="application/x-ndjson")
 
 @app.post("/api/export-csv")
 async def export_differences_csv(
     file1: UploadFile = File(...),
-    file2: UploadFile = File(...)
+    file2: UploadFile = File(...),
+    sheets: Optional[Union[str, Tuple[str, ...]]] = Depends(sheet_selection),
+    profile: Optional[str] = Depends(profile_token)
 ):
-    """비교 결과를 CSV로 다운로드"""
+    """비교 결과를 CSV로 다운로드
     
-    # 임시 파일로 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp1:
-        content1 = await file1.read()
-        tmp1.write(content1)
-        tmp1_path = tmp1.name
+    관리자 토큰으로 프로파일링하면 보고서 ID를 X-Profile-Id 헤더로 돌려주고
+    보고서는 /api/profiles/{id} 로 조회한다.
+    """
+    profiling = check_profile_request(profile)
+    check_uploads([file1, file2])
     
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp2:
-        content2 = await file2.read()
-        tmp2.write(content2)
-        tmp2_path = tmp2.name
+    # 업로드 준비 (필요할 때만 청크 단위 임시 파일)
+    upload1, upload2 = [await prepare_upload(file) for file in [file1, file2]]
     
     try:
-        comparator = ExcelComparator(tmp1_path, tmp2_path)
-        csv_content = comparator.export_differences_to_csv()
+        if profiling:
+            content, report = await run_blocking(run_profiled, _export_csv_bytes, upload1, upload2, sheets)
+            return Response(
+                content,
+                media_type="text/csv",
+                headers={
+                    "Content-Disposition": "attachment; filename=comparison_result.csv",
+                    "X-Profile-Id": report['profileId']
+                }
+            )
+        frame = await run_blocking(_export_files, upload1, upload2, sheets)
+        return csv_response(iter_csv(frame))
+    
+    finally:
+        cleanup_uploads([upload1, upload2])
+
+PROFILE_ID_PATTERN = r'^[0-9a-f]{32}$'
+
+def profile_report_path(profile_id: str, suffix: str, token: Optional[str]) -> str:
+    """저장된 프로파일링 보고서 경로 (관리자 토큰 필요, 없으면 404)"""
+    if not check_profile_request(token):
+        raise HTTPException(status_code=403, detail="프로파일링 권한이 없습니다.")
+    path = os.path.join(PROFILE_DIR, profile_id + suffix)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="프로파일링 보고서가 없습니다.")
+    return path
+
+@app.get("/api/profiles/{profile_id}")
+def get_profile_report(
+    profile_id: str = Path(..., pattern=PROFILE_ID_PATTERN),
+    profile: Optional[str] = Depends(profile_token)
+):
+    """프로파일링 보고서 (누적 시간 기준 상위 함수)"""
+    with open(profile_report_path(profile_id, '.json', profile), encoding='utf-8') as f:
+        return json.load(f)
+
+@app.get("/api/profiles/{profile_id}/stacks")
+def get_profile_stacks(
+    profile_id: str = Path(..., pattern=PROFILE_ID_PATTERN),
+    profile: Optional[str] = Depends(profile_token)
+):
+    """flame graph용 collapsed 스택 (flamegraph.pl, speedscope에서 열 수 있음)"""
+    with open(profile_report_path(profile_id, '.collapsed.txt', profile), encoding='utf-8') as f:
+        return PlainTextResponse(f.read())
+
+@app.get("/api/sessions/{session_id}/export-csv")
+async def export_session_csv(session_id: str):
+    """저장된 비교 세션의 결과를 CSV로 다운로드 (파일 재업로드 없음)"""
+    comparator = get_session_comparator(session_id, OrderComparatorBase)
+    frame = await run_blocking(comparator.get_shipping_difference_frame)
+    return csv_response(iter_csv(frame))
+
+# 세션 결과 조회 시 정렬 가능한 열
+SHIPPING_SORT_FIELDS = ['absDifference', 'difference', 'shippingFee1', 'shippingFee2', 'orderNo', 'customerName']
+EXCLUSIVE_SORT_FIELDS = ['totalAmount', 'productCount', 'orderNo', 'customerName']
+
+def _check_sort_field(sort_by: Optional[str], allowed: List[str]):
+    if sort_by is not None and sort_by not in allowed:
+        raise HTTPException(status_code=400, detail=f"정렬할 수 없는 항목입니다: {sort_by} (가능: {', '.join(allowed)})")
+
+@app.get("/api/sessions/{session_id}/memory")
+def get_session_memory(session_id: str):
+    """세션 비교기가 들고 있는 데이터의 열별 메모리 사용량 (압축 전/후)"""
+    return get_session_comparator(session_id, OrderComparatorBase).get_memory_report()
+
+@app.get("/api/sessions/{session_id}/shipping-differences")
+async def query_shipping_differences(
+    session_id: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=1000, alias="pageSize"),
+    sort_by: Optional[str] = Query(None, alias="sortBy"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    order_no: Optional[str] = Query(None, alias="orderNo", description="주문번호 부분 일치"),
+    customer_name: Optional[str] = Query(None, alias="customerName", description="수취인명 부분 일치")
+):
+    """세션의 배송비 차이 목록을 페이지 단위로 조회 (기본 정렬: 차이 절대값 내림차순)"""
+    _check_sort_field(sort_by, SHIPPING_SORT_FIELDS)
+    comparator = get_session_comparator(session_id, OrderComparatorBase)
+    frame = await run_blocking(comparator.get_shipping_difference_frame)
+    return query_frame(
+        frame, page, page_size, sort_by, order == "desc",
+        filters={'orderNo': order_no, 'customerName': customer_name}
+    )
+
+@app.get("/api/sessions/{session_id}/exclusive-orders/{side}")
+async def query_exclusive_orders(
+    session_id: str,
+    side: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=1000, alias="pageSize"),
+    sort_by: Optional[str] = Query(None, alias="sortBy"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    order_no: Optional[str] = Query(None, alias="orderNo", description="주문번호 부분 일치"),
+    customer_name: Optional[str] = Query(None, alias="customerName", description="수취인명 부분 일치")
+):
+    """세션의 고유 주문 목록(side: onlyInFile1 / onlyInFile2)을 페이지 단위로 조회"""
+    if side not in ('onlyInFile1', 'onlyInFile2'):
+        raise HTTPException(status_code=404, detail=f"알 수 없는 목록입니다: {side}")
+    _check_sort_field(sort_by, EXCLUSIVE_SORT_FIELDS)
+    comparator = get_session_comparator(session_id, OrderComparatorBase)
+    frames = await run_blocking(comparator.get_exclusive_order_frames)
+    return query_frame(
+        frames[side], page, page_size, sort_by, order == "desc",
+        filters={'orderNo': order_no, 'customerName': customer_name}
+    )
+
+FIELD_SORT_FIELDS = ['absDifference', 'difference', 'value1', 'value2', 'orderNo', 'field']
+
+@app.get("/api/sessions/{session_id}/field-differences")
+async def query_field_differences(
+    session_id: str,
+    abs_tol: float = Query(0.0, ge=0, alias="absTol", description="절대 허용 오차"),
+    rel_tol: float = Query(0.0, ge=0, alias="relTol", description="상대 허용 오차 (0.01 = 1%)"),
+    fields: Optional[str] = Query(None, description="비교할 필드 (쉼표 구분, 기본: 공통 숫자 열 전체)"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=1000, alias="pageSize"),
+    sort_by: Optional[str] = Query(None, alias="sortBy"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    order_no: Optional[str] = Query(None, alias="orderNo", description="주문번호 부분 일치"),
+    field: Optional[str] = Query(None, description="필드명 부분 일치")
+):
+    """세션의 주문별·필드별 차이를 페이지 단위로 조회 (기본 정렬: 차이 절대값 내림차순)"""
+    _check_sort_field(sort_by, FIELD_SORT_FIELDS)
+    comparator = get_session_comparator(session_id)
+    field_list = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    frame = await run_blocking(comparator.get_field_difference_frame, abs_tol, rel_tol, field_list)
+    
+    result = query_frame(
+        frame, page, page_size, sort_by, order == "desc",
+        filters={'orderNo': order_no, 'field': field}
+    )
+    result['fields'] = comparator.get_numeric_fields() if field_list is None else field_list
+    return result
+
+LINE_DIFFERENCE_KINDS = ['changed', 'added', 'removed']
+
+@app.get("/api/sessions/{session_id}/line-differences/{kind}")
+async def query_line_differences(
+    session_id: str,
+    kind: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=1000, alias="pageSize"),
+    order_no: Optional[str] = Query(None, alias="orderNo", description="주문번호 부분 일치"),
+    product_code: Optional[str] = Query(None, alias="productCode", description="상품코드 부분 일치")
+):
+    """세션의 행 단위 차이(kind: changed / added / removed)를 페이지 단위로 조회 (두 파일의 모든 공통 열 비교)"""
+    if kind not in LINE_DIFFERENCE_KINDS:
+        raise HTTPException(status_code=404, detail=f"알 수 없는 목록입니다: {kind}")
+    comparator = get_session_comparator(session_id)
+    frames = await run_blocking(comparator.get_line_difference_frames)
+    
+    result = query_frame(
+        frames[kind], page, page_size,
+        filters={'orderNo': order_no, 'productCode': product_code}
+    )
+    result['counts'] = {name: len(frame) for name, frame in frames.items()}
+    return result
+
+@app.post("/api/compare-multi")
+async def compare_multiple_files(
+    files: List[UploadFile] = File(...),
+    sheets: Optional[Union[str, Tuple[str, ...]]] = Depends(sheet_selection)
+):
+    """여러 주문 파일(예: 마켓, 창고, ERP)을 한 번에 비교하고 세션 생성
+    
+    응답에는 요약만 담고, 주문별 포함 여부와 기준 파일 대비 차이는 세션 조회 API로 가져간다.
+    파일 순서대로 file1, file2, ... 로 부른다.
+    """
+    if len(files) < 2:
+        raise HTTPException(status_code=400, detail="비교할 파일을 2개 이상 올려주세요.")
+    check_uploads(files)
+    
+    uploads = [await prepare_upload(file) for file in files]
+    
+    try:
+        result = await run_blocking(_compare_multi_files, uploads, sheets)
+        result['fileNames'] = [file.filename for file in files]
+        return result
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    finally:
+        cleanup_uploads(uploads)
+
+@app.get("/api/sessions/{session_id}/presence")
+async def query_presence(
+    session_id: str,
+    missing_only: bool = Query(False, alias="missingOnly", description="일부 파일에 없는 주문만"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=1000, alias="pageSize"),
+    order_no: Optional[str] = Query(None, alias="orderNo", description="주문번호 부분 일치")
+):
+    """N개 파일 비교 세션의 주문별 파일 포함 여부를 페이지 단위로 조회"""
+    comparator = get_session_comparator(session_id, MultiExcelComparator)
+    frame = await run_blocking(comparator.get_presence_frame)
+    if missing_only:
+        frame = frame[frame['fileCount'] < len(comparator.labels)]
+    return query_frame(frame, page, page_size, filters={'orderNo': order_no})
+
+@app.get("/api/sessions/{session_id}/reference-differences")
+async def query_reference_differences(
+    session_id: str,
+    reference: int = Query(1, ge=1, description="기준 파일 번호 (1부터)"),
+    abs_tol: float = Query(0.0, ge=0, alias="absTol", description="절대 허용 오차"),
+    rel_tol: float = Query(0.0, ge=0, alias="relTol", description="상대 허용 오차 (0.01 = 1%)"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=1000, alias="pageSize"),
+    order_no: Optional[str] = Query(None, alias="orderNo", description="주문번호 부분 일치"),
+    field: Optional[str] = Query(None, description="필드명 부분 일치"),
+    file: Optional[str] = Query(None, description="파일 (예: file2)")
+):
+    """N개 파일 비교 세션에서 기준 파일 대비 주문별·필드별 차이를 페이지 단위로 조회"""
+    comparator = get_session_comparator(session_id, MultiExcelComparator)
+    if reference > len(comparator.labels):
+        raise HTTPException(status_code=400, detail=f"기준 파일 번호는 1~{len(comparator.labels)} 사이여야 합니다.")
+    frame = await run_blocking(comparator.get_reference_difference_frame, reference - 1, abs_tol, rel_tol)
+    if file:
+        frame = frame[frame['file'] == file]
+    return query_frame(frame, page, page_size, filters={'orderNo': order_no, 'field': field})
+
+@app.post("/api/compare-batch")
+async def compare_batch(
+    archive: Optional[UploadFile] = File(None, description="주문 파일들을 담은 zip (매니페스트 선택)"),
+    files: Optional[List[UploadFile]] = File(None, description="주문 파일들 (manifest와 함께)"),
+    manifest: Optional[UploadFile] = File(None, description="비교할 쌍 목록 (CSV 또는 JSON)"),
+    sheets: Optional[Union[str, Tuple[str, ...]]] = Depends(sheet_selection)
+):
+    """여러 파일 쌍(예: 매장/마켓별 월말 대사)을 한 번에 비교
+    
+    zip 아카이브를 올리거나 파일들과 매니페스트를 함께 올린다. 매니페스트가 없으면
+    아카이브 안에서 주문 파일이 2개인 폴더마다 한 쌍으로 비교한다.
+    응답에는 쌍별 요약을 담고, 상세 결과는 /api/batches/{batchId}/download 의 zip으로 받는다.
+    """
+    if archive is None and not files:
+        raise HTTPException(status_code=400, detail="zip 아카이브 또는 파일들과 매니페스트를 올려주세요.")
+    if files and manifest is None:
+        raise HTTPException(status_code=400, detail="파일들을 올릴 때는 매니페스트가 필요합니다.")
+    
+    # 업로드는 이름 그대로 한 폴더에 저장하므로 이름이 없거나 겹치면 거부
+    file_names = [os.path.basename(file.filename or '') for file in files or []]
+    if any(name in ('', '.', '..') for name in file_names):
+        raise HTTPException(status_code=400, detail="파일 이름이 없는 업로드가 있습니다.")
+    duplicates = sorted({name for name in file_names if file_names.count(name) > 1})
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"같은 이름의 파일이 여러 개 있습니다: {', '.join(duplicates)}")
+    
+    target_dir = tempfile.mkdtemp(prefix='batch-')
+    
+    def prepare() -> Tuple[List[BatchPair], Dict[str, PreparedUpload]]:
+        names = extract_batch_archive(archive.file, target_dir) if archive is not None else []
+        for file, name in zip(files or [], file_names):
+            with open(os.path.join(target_dir, name), 'wb') as dst:
+                shutil.copyfileobj(file.file, dst, UPLOAD_CHUNK_SIZE)
+            names.append(name)
         
-        return StreamingResponse(
-            io.BytesIO(csv_content),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=comparison_result.csv"}
+        manifest_path = None
+        if manifest is not None:
+            suffix = os.path.splitext(manifest.filename or '')[1] or '.csv'
+            manifest_path = os.path.join(target_dir, '.manifest' + suffix)
+            with open(manifest_path, 'wb') as dst:
+                shutil.copyfileobj(manifest.file, dst, UPLOAD_CHUNK_SIZE)
+        return _prepare_batch(target_dir, names, manifest_path)
+    
+    try:
+        pairs, uploads = await run_blocking(prepare)
+        return await _compare_batch(pairs, uploads, sheets)
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    finally:
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+def get_batch(batch_id: str) -> BatchResult:
+    batch = batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="일괄 비교 결과가 없거나 만료되었습니다. 다시 비교해주세요.")
+    return batch
+
+@app.get("/api/batches/{batch_id}")
+def get_batch_summary(batch_id: str):
+    """일괄 비교의 쌍별 요약"""
+    return {'batchId': batch_id, 'pairs': get_batch(batch_id).items}
+
+@app.get("/api/batches/{batch_id}/download")
+async def download_batch(batch_id: str):
+    """일괄 비교의 상세 결과 zip (summary.csv + 쌍별 배송비 차이, 고유 주문 CSV)"""
+    batch = get_batch(batch_id)
+    target = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    await run_blocking(write_batch_archive, batch, target)
+    target.seek(0)
+    return StreamingResponse(
+        iter_file(target),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=batch_{batch_id}.zip"}
+    )
+
+@app.post("/api/jobs/compare", status_code=202)
+async def submit_compare_job(
+    file1: UploadFile = File(...),
+    file2: UploadFile = File(...),
+    limit: Optional[int] = Query(None, ge=1, description="배송비 차이 상위 N건만 반환"),
+    summary_only: bool = Query(False, alias="summaryOnly", description="요약만 반환 (목록은 세션 조회 API 사용)"),
+    sheets: Optional[Union[str, Tuple[str, ...]]] = Depends(sheet_selection)
+):
+    """두 주문 파일 비교를 백그라운드 작업으로 등록하고 작업 ID를 바로 반환
+    
+    진행 상황은 GET /api/jobs/{jobId} (폴링) 또는 /api/jobs/{jobId}/events (SSE)로 확인하고,
+    끝나면 GET /api/jobs/{jobId} 의 result에 /api/compare 와 같은 형식의 결과가 담긴다.
+    """
+    check_uploads([file1, file2])
+    
+    # 요청이 끝난 뒤에도 읽어야 하므로 임시 파일로 준비 (작업이 끝나면 삭제)
+    uploads = [await prepare_upload(file, to_disk=True) for file in [file1, file2]]
+    try:
+        job = submit_job(
+            COMPARE_JOB_STAGES, functools.partial(cleanup_uploads, uploads), _run_compare_job, *uploads,
+            limit=limit, summary_only=summary_only, sheets=sheets
         )
+    except HTTPException:
+        cleanup_uploads(uploads)
+        raise
+    return job.snapshot()
+
+def get_job(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업이 없거나 만료되었습니다.")
+    return job
+
+@app.get("/api/jobs/{job_id}")
+def get_job_status(job_id: str):
+    """작업 상태와 진행 단계 (완료되면 결과 포함)"""
+    return get_job(job_id).snapshot()
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """작업 진행 상황을 SSE로 전송 (변경될 때마다 progress, 끝나면 done/failed/cancelled 이벤트)"""
+    job = get_job(job_id)
+    
+    def sse_event(event: str, data: Any) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    
+    async def events():
+        last = None
+        while True:
+            snapshot = job.snapshot(include_result=False)
+            if snapshot['status'] in Job.FINISHED:
+                yield sse_event(snapshot['status'], snapshot)
+                return
+            if snapshot != last:
+                yield sse_event('progress', snapshot)
+                last = snapshot
+            await asyncio.sleep(JOB_EVENT_INTERVAL)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/api/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """작업 취소 (대기 중이면 바로, 실행 중이면 현재 단계가 끝나는 대로 멈춤)"""
+    job = get_job(job_id)
+    if not job.cancel():
+        raise HTTPException(status_code=409, detail=f"이미 끝난 작업입니다: {job.status}")
+    return job.snapshot(include_result=False)
+
+BASELINE_NAME_PATTERN = r'^[\w-]{1,64}$'
+
+@app.post("/api/baselines/{name}")
+async def create_comparison_baseline(
+    name: str = Path(..., pattern=BASELINE_NAME_PATTERN, description="기준 이름 (예: warehouse-daily)"),
+    file1: UploadFile = File(...),
+    file2: UploadFile = File(...),
+    sheets: Optional[Union[str, Tuple[str, ...]]] = Depends(sheet_selection)
+):
+    """두 파일을 비교하고 주문별 집계를 이름 붙은 증분 비교 기준으로 저장 (같은 이름이 있으면 교체)"""
+    check_uploads([file1, file2])
+    
+    uploads = [await prepare_upload(file) for file in [file1, file2]]
+    try:
+        return await run_blocking(_create_baseline, name, *uploads, sheets=sheets)
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    finally:
+        cleanup_uploads(uploads)
+
+@app.post("/api/baselines/{name}/update")
+async def update_comparison_baseline(
+    name: str = Path(..., pattern=BASELINE_NAME_PATTERN),
+    file1: Optional[UploadFile] = File(None, description="파일1의 새 버전"),
+    file2: Optional[UploadFile] = File(None, description="파일2의 새 버전"),
+    sheets: Optional[Union[str, Tuple[str, ...]]] = Depends(sheet_selection)
+):
+    """한쪽 또는 양쪽 파일의 새 버전으로 기준을 갱신
+    
+    바뀐 주문(추가·삭제·변경)의 배송비 차이만 다시 계산해 차이 표를 고치고,
+    직전 실행 대비 변화(new, resolved, changed)는 /api/baselines/{name}/delta 로 조회한다.
+    """
+    files = {side: file for side, file in enumerate([file1, file2]) if file is not None}
+    if not files:
+        raise HTTPException(status_code=400, detail="새 버전 파일을 하나 이상 올려주세요.")
+    check_uploads(list(files.values()))
+    
+    uploads = {side: await prepare_upload(file) for side, file in files.items()}
+    try:
+        return await run_blocking(_update_baseline, name, uploads, sheets=sheets)
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
     
     finally:
-        os.unlink(tmp1_path)
-        os.unlink(tmp2_path)
+        cleanup_uploads(list(uploads.values()))
+
+def get_baseline(name: str) -> ComparisonBaseline:
+    baseline = baselines.get(name)
+    if baseline is None:
+        raise HTTPException(status_code=404, detail=f"비교 기준이 없습니다: {name}")
+    return baseline
+
+@app.get("/api/baselines/{name}")
+async def get_comparison_baseline(name: str = Path(..., pattern=BASELINE_NAME_PATTERN)):
+    """저장된 기준의 요약 비교 결과와 직전 실행 대비 변화 건수 (조회용 세션 생성)"""
+    baseline = get_baseline(name)
+    return await run_blocking(baseline_response, baseline, baseline_comparator(baseline))
+
+@app.get("/api/baselines/{name}/delta")
+def query_baseline_delta(
+    name: str = Path(..., pattern=BASELINE_NAME_PATTERN),
+    change: Optional[str] = Query(None, pattern='^(new|resolved|changed)$', description="변화 종류"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=1000, alias="pageSize"),
+    order_no: Optional[str] = Query(None, alias="orderNo", description="주문번호 부분 일치")
+):
+    """직전 실행 대비 배송비 차이 변화 (new: 새로 생긴 차이, resolved: 사라진 차이, changed: 차이 금액 변경)"""
+    frame = get_baseline(name).delta
+    if change:
+        frame = frame[frame['change'] == change]
+    return query_frame(frame, page, page_size, filters={'orderNo': order_no})
+
+@app.delete("/api/baselines/{name}")
+def delete_comparison_baseline(name: str = Path(..., pattern=BASELINE_NAME_PATTERN)):
+    """비교 기준 삭제"""
+    with baselines.update_lock:
+        deleted = baselines.delete(name)
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"비교 기준이 없습니다: {name}")
+    return {"deleted": name}
+
+@app.delete("/api/sessions/{session_id}")
+def delete_session(session_id: str):
+    """비교 세션 삭제"""
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="비교 세션이 없거나 만료되었습니다.")
+    return {"deleted": session_id}
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # python -m app.main cache-clean : 오래된 디스크 캐시 정리, cache-clear : 디스크 캐시 전부 삭제
+    if sys.argv[1:2] in (['cache-clean'], ['cache-clear']):
+        print(json.dumps(disk_cache.cleanup(clear=sys.argv[1] == 'cache-clear'), ensure_ascii=False, indent=2))
+    else:
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,164 @@
+"""요청·단계별 처리 시간과 처리량 지표 (Prometheus 텍스트 형식, Server-Timing 헤더)"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import contextlib
+import contextvars
+import threading
+import time
+
+from starlette.datastructures import MutableHeaders
+
+# 요청 지연 시간 히스토그램 구간 (초)
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+
+class Metrics:
+    """Prometheus 텍스트 형식으로 내보내는 프로세스 내 지표 (카운터, 게이지, 히스토그램)"""
+    
+    def __init__(self):
+        self._types: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self._histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], List[float]]] = {}
+        self._lock = threading.Lock()
+    
+    def describe(self, name: str, kind: str, help_text: str):
+        self._types[name] = (kind, help_text)
+        if kind == 'histogram':
+            self._histograms.setdefault(name, {})
+        else:
+            self._values.setdefault(name, {})
+    
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    def inc(self, name: str, value: float = 1, **labels):
+        """카운터 증가 (게이지는 음수로 감소)"""
+        key = self._labels(labels)
+        with self._lock:
+            values = self._values[name]
+            values[key] = values.get(key, 0) + value
+    
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._values[name][self._labels(labels)] = value
+    
+    def observe(self, name: str, value: float, **labels):
+        """히스토그램에 값 기록 (구간별 개수, 합계, 개수)"""
+        key = self._labels(labels)
+        with self._lock:
+            counts = self._histograms[name].setdefault(key, [0] * (len(LATENCY_BUCKETS) + 2))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += value
+            counts[-1] += 1
+    
+    @staticmethod
+    def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+        if not labels:
+            return ''
+        escaped = [
+            '{}="{}"'.format(key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for key, value in labels
+        ]
+        return '{' + ','.join(escaped) + '}'
+    
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in self._types.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                if kind != 'histogram':
+                    for labels, value in self._values[name].items():
+                        lines.append(f'{name}{self._format_labels(labels)} {value:g}')
+                    continue
+                for labels, counts in self._histograms[name].items():
+                    for bound, count in zip([*LATENCY_BUCKETS, '+Inf'], [*counts[:-2], counts[-1]]):
+                        bucket = self._format_labels((*labels, ('le', str(bound))))
+                        lines.append(f'{name}_bucket{bucket} {count:g}')
+                    lines.append(f'{name}_sum{self._format_labels(labels)} {counts[-2]:g}')
+                    lines.append(f'{name}_count{self._format_labels(labels)} {counts[-1]:g}')
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+metrics.describe('compare_http_request_duration_seconds', 'histogram', 'HTTP 요청 처리 시간 (경로, 메서드, 상태별)')
+metrics.describe('compare_http_requests_in_flight', 'gauge', '처리 중인 HTTP 요청 수')
+metrics.describe('compare_stage_duration_seconds', 'histogram', '비교·내보내기 단계별 처리 시간')
+metrics.describe('compare_upload_bytes_total', 'counter', '받은 업로드 크기 합계 (바이트)')
+metrics.describe('compare_parsed_rows_total', 'counter', '새로 파싱한 주문 행 수 (캐시 사용 제외)')
+metrics.describe('compare_parsed_files_total', 'counter', '읽은 파일 수 (source: parse, memory, disk)')
+metrics.describe('compare_pending_jobs', 'gauge', '실행 중이거나 대기 중인 비교 작업 수')
+metrics.describe('compare_cache_bytes', 'gauge', '캐시 사용량 (바이트)')
+metrics.describe('compare_cache_hits_total', 'counter', '캐시 히트 수')
+metrics.describe('compare_cache_misses_total', 'counter', '캐시 미스 수')
+
+class RequestTiming:
+    """한 요청에서 거친 단계별 시간 (Server-Timing 헤더용, 같은 단계는 합산)"""
+    
+    def __init__(self):
+        self.stages: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+    
+    def header(self, total: float) -> str:
+        with self._lock:
+            stages = list(self.stages.items())
+        return ', '.join(f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in [*stages, ('total', total)])
+
+_request_timing: contextvars.ContextVar[Optional[RequestTiming]] = contextvars.ContextVar('request_timing', default=None)
+
+@contextlib.contextmanager
+def timed(stage: str):
+    """단계 시간을 지표 히스토그램과 (요청 중이면) 그 요청의 Server-Timing에 기록"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        metrics.observe('compare_stage_duration_seconds', seconds, stage=stage)
+        timing = _request_timing.get()
+        if timing is not None:
+            timing.add(stage, seconds)
+
+class RequestMetricsMiddleware:
+    """요청별 처리 시간·동시 요청 수 지표를 남기고 단계별 시간을 Server-Timing 헤더로 반환
+    
+    스트리밍 응답도 본문을 다 보낼 때까지 처리 중인 요청으로 세도록 ASGI 수준에서 감싼다.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        timing = RequestTiming()
+        token = _request_timing.set(timing)
+        metrics.inc('compare_http_requests_in_flight')
+        start = time.perf_counter()
+        status = 500
+        
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                MutableHeaders(scope=message).append('Server-Timing', timing.header(time.perf_counter() - start))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.inc('compare_http_requests_in_flight', -1)
+            # 경로 변수(세션 ID 등)로 라벨이 늘지 않도록 라우트 경로 템플릿 사용
+            route = scope.get('route')
+            metrics.observe(
+                'compare_http_request_duration_seconds', time.perf_counter() - start,
+                route=getattr(route, 'path', 'unmatched'), method=scope['method'], status=status
+            )
+            _request_timing.reset(token)
@@ -0,0 +1,160 @@
+"""관리자용 요청 프로파일링 (cProfile + 스택 샘플링 보고서)"""
+from typing import Any, Dict, List, Optional, Tuple
+import cProfile
+import contextvars
+import hmac
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from fastapi import HTTPException
+
+# 요청 프로파일링 (관리자용, PROFILE_TOKEN이 없으면 사용할 수 없음)
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'compare-orders-profiles'))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', '5')) / 1000
+PROFILE_TOP_FUNCTIONS = 30
+# 저장된 보고서 보관 한도 (개수와 기간, 넘으면 오래된 보고서부터 삭제)
+PROFILE_MAX_REPORTS = int(os.environ.get('PROFILE_MAX_REPORTS', '50'))
+PROFILE_MAX_AGE_DAYS = float(os.environ.get('PROFILE_MAX_AGE_DAYS', '7'))
+
+# 프로파일링 중인 요청은 캐시와 프로세스 풀을 건너뛰고 현재 스레드에서 전부 계산
+_profiling: contextvars.ContextVar[bool] = contextvars.ContextVar('profiling', default=False)
+
+def is_profiling() -> bool:
+    """현재 요청이 프로파일링 중인지 여부"""
+    return _profiling.get()
+
+def check_profile_request(token: Optional[str]) -> bool:
+    """프로파일링 요청 여부 (토큰이 틀리거나 PROFILE_TOKEN이 설정되지 않았으면 403)"""
+    if not token:
+        return False
+    if not PROFILE_TOKEN or not hmac.compare_digest(token.encode('utf-8'), PROFILE_TOKEN.encode('utf-8')):
+        raise HTTPException(status_code=403, detail="프로파일링 권한이 없습니다.")
+    return True
+
+class StackSampler:
+    """대상 스레드의 호출 스택을 일정 간격으로 모아 flame graph용 collapsed 형식("a;b;c 개수")으로 집계"""
+    
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if names:
+                stack = ';'.join(reversed(names))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+                self.samples += 1
+    
+    def collapsed(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.stacks.items()))
+
+def top_functions(profiler: cProfile.Profile, limit: int = PROFILE_TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    """누적 시간 기준 상위 함수 (호출 수, 자체 시간, 누적 시간)"""
+    stats = pstats.Stats(profiler).stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            'function': f'{name} ({os.path.basename(filename)}:{line})',
+            'calls': calls,
+            'totalTime': round(total_time, 6),
+            'cumulativeTime': round(cumulative_time, 6)
+        }
+        for (filename, line, name), (_, calls, total_time, cumulative_time, _) in ranked
+    ]
+
+def cleanup_profiles(
+    max_reports: int = PROFILE_MAX_REPORTS,
+    max_age_days: float = PROFILE_MAX_AGE_DAYS
+) -> int:
+    """보관 기간이 지났거나 최근 max_reports개 밖인 보고서(<id>.json, .prof, .collapsed.txt)를 지우고 삭제한 보고서 수 반환"""
+    try:
+        names = os.listdir(PROFILE_DIR)
+    except FileNotFoundError:
+        return 0
+    # 보고서 ID별 파일과 가장 최근 수정 시각
+    reports: Dict[str, Tuple[float, List[str]]] = {}
+    for name in names:
+        profile_id = name.split('.', 1)[0]
+        path = os.path.join(PROFILE_DIR, name)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            continue
+        latest, paths = reports.get(profile_id, (0.0, []))
+        reports[profile_id] = (max(latest, mtime), [*paths, path])
+    
+    cutoff = time.time() - max_age_days * 24 * 3600
+    ranked = sorted(reports.values(), key=lambda report: report[0], reverse=True)
+    removed = 0
+    for index, (mtime, paths) in enumerate(ranked):
+        if index < max_reports and mtime >= cutoff:
+            continue
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        removed += 1
+    return removed
+
+def run_profiled(func, *args, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """실행기 스레드 안에서 func를 cProfile(결정적)과 스택 샘플링으로 함께 실행하고 보고서 저장
+    
+    PROFILE_DIR에 <id>.collapsed.txt (flamegraph.pl, speedscope용), <id>.prof (pstats),
+    <id>.json (상위 함수)을 남기고 보고서 요약을 결과와 함께 돌려준다.
+    저장한 뒤 보관 한도를 넘은 오래된 보고서는 지운다.
+    """
+    token = _profiling.set(True)
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+    start = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        sampler.stop()
+        _profiling.reset(token)
+    
+    profile_id = uuid.uuid4().hex
+    report = {
+        'profileId': profile_id,
+        'durationSeconds': round(time.perf_counter() - start, 6),
+        'sampleIntervalMs': PROFILE_SAMPLE_INTERVAL * 1000,
+        'samples': sampler.samples,
+        'topFunctions': top_functions(profiler),
+        'stacksUrl': f'/api/profiles/{profile_id}/stacks'
+    }
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, f'{profile_id}.collapsed.txt'), 'w', encoding='utf-8') as f:
+        f.write(sampler.collapsed())
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f'{profile_id}.prof'))
+    with open(os.path.join(PROFILE_DIR, f'{profile_id}.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    cleanup_profiles()
+    return result, report
@@ -0,0 +1,306 @@
+"""주문 파일 읽기 (엑셀, CSV, Parquet), 읽은 표 압축, 병렬 로드"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+import multiprocessing
+import os
+import threading
+
+import pandas as pd
+
+from .profiling import is_profiling
+
+# 비교 분석에 사용하는 열 (요약·내보내기·배치·비교 기준처럼 이 열만 쓰는 경로는 이 열만 읽음)
+TEXT_COLUMNS = ['주문번호', '수취인명', '상품코드']
+AMOUNT_COLUMNS = ['판매액', '배송비', '공급단가', '공급가액']
+ORDER_COLUMNS = TEXT_COLUMNS + AMOUNT_COLUMNS
+
+def _read_columns() -> Optional[List[str]]:
+    """열을 골라 읽는 경로의 열 목록: 분석 열 + EXTRA_READ_COLUMNS(쉼표 구분, '*'이면 모든 열)
+    
+    세션에 남아 필드·행 단위 비교를 하는 비교기는 이 설정과 관계없이 모든 열을 읽는다 (load_uploads 참고).
+    """
+    extra = os.environ.get('EXTRA_READ_COLUMNS', '').strip()
+    if extra == '*':
+        return None
+    return ORDER_COLUMNS + [column.strip() for column in extra.split(',') if column.strip()]
+
+READ_COLUMNS = _read_columns()
+
+def _detect_excel_engine() -> Optional[str]:
+    """엑셀 읽기 엔진 선택: EXCEL_ENGINE 환경변수 > calamine(설치 시) > pandas 기본(openpyxl)"""
+    engine = os.environ.get('EXCEL_ENGINE')
+    if engine:
+        return engine
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        return None
+
+EXCEL_ENGINE = _detect_excel_engine()
+
+# 지원하는 입력 형식 (확장자 -> 형식)
+FILE_FORMATS = {
+    '.xlsx': 'xlsx', '.xlsm': 'xlsx', '.xls': 'xls',
+    '.csv': 'csv', '.txt': 'csv',
+    '.parquet': 'parquet', '.pq': 'parquet'
+}
+# 파일 앞부분 시그니처 (확장자보다 우선)
+FORMAT_SIGNATURES = [(b'PK\x03\x04', 'xlsx'), (b'\xd0\xcf\x11\xe0', 'xls'), (b'PAR1', 'parquet')]
+
+def detect_file_format(filename: str, head: bytes = b'') -> Optional[str]:
+    """파일 앞부분 시그니처와 확장자로 형식 판별 ('xlsx', 'xls', 'csv', 'parquet', 모르면 None)"""
+    for signature, file_format in FORMAT_SIGNATURES:
+        if head.startswith(signature):
+            return file_format
+    return FILE_FORMATS.get(os.path.splitext(filename.lower())[1])
+
+def _source_format(source: Union[str, BinaryIO]) -> Optional[str]:
+    """경로 또는 파일 객체의 형식 판별 (파일 객체는 읽은 뒤 처음으로 되감음)"""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return detect_file_format(source, f.read(8))
+    head = source.read(8)
+    source.seek(0)
+    return detect_file_format(getattr(source, 'name', None) or '', head)
+
+def _rewind(source: Union[str, BinaryIO]) -> Union[str, BinaryIO]:
+    if not isinstance(source, str):
+        source.seek(0)
+    return source
+
+def _detect_csv_engine() -> Optional[str]:
+    """CSV 파서 선택: CSV_ENGINE 환경변수 > pyarrow(설치 시, 멀티스레드) > pandas 기본(c)"""
+    engine = os.environ.get('CSV_ENGINE')
+    if engine:
+        return engine
+    try:
+        import pyarrow  # noqa: F401
+        return 'pyarrow'
+    except ImportError:
+        return None
+
+CSV_ENGINE = _detect_csv_engine()
+# CSV 인코딩 시도 순서 (쉼표 구분)
+CSV_ENCODINGS = [
+    encoding.strip() for encoding in os.environ.get('CSV_ENCODINGS', 'utf-8-sig,cp949').split(',')
+    if encoding.strip()
+]
+
+def _as_text(values: pd.Series) -> pd.Series:
+    """숫자로 저장된 텍스트 열을 문자열로 (1234.0 -> '1234', 빈 값은 유지)"""
+    if pd.api.types.is_object_dtype(values):
+        return values
+    if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+        values = values.astype('Int64')
+    return values.astype(str).where(values.notna())
+
+def _finish_order_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """금액 열을 숫자로 바꾸고 (설정 시) 메모리 압축"""
+    for column in AMOUNT_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    
+    if COMPACT_FRAMES:
+        df = compact_frame(df)
+    return df
+
+class SheetNotFoundError(ValueError):
+    """고른 시트가 통합 문서에 없음 (프로세스 풀에서도 전달되도록 메시지만 담음)"""
+
+def read_excel_orders(
+    path: Union[str, BinaryIO],
+    usecols: Optional[List[str]] = READ_COLUMNS,
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None
+) -> Tuple[pd.DataFrame, List[Any]]:
+    """엑셀 시트를 읽어 (필요한 열만 담은 DataFrame, 시트의 전체 열 목록) 반환
+    
+    sheets가 없으면 첫 시트, '*'이면 모든 시트, 이름 목록이면 해당 시트만 읽어 위아래로 이어 붙인다.
+    없는 시트 이름이 있으면 SheetNotFoundError.
+    """
+    all_columns = []
+    
+    def select_column(column) -> bool:
+        # 헤더의 모든 열 이름이 한 번씩 전달되므로 열 비교용 목록도 여기서 수집
+        all_columns.append(column)
+        return usecols is None or column in usecols
+    
+    if sheets is None:
+        sheet_name = 0
+    elif sheets == '*':
+        sheet_name = None
+    else:
+        sheet_name = list(sheets)
+    
+    with pd.ExcelFile(path, engine=EXCEL_ENGINE) as workbook:
+        if isinstance(sheet_name, list):
+            missing = [name for name in sheet_name if name not in workbook.sheet_names]
+            if missing:
+                raise SheetNotFoundError(
+                    f"파일에 없는 시트입니다: {', '.join(missing)} (있는 시트: {', '.join(map(str, workbook.sheet_names))})"
+                )
+        df = workbook.parse(
+            sheet_name=sheet_name,
+            usecols=select_column,
+            dtype={column: str for column in TEXT_COLUMNS}
+        )
+    if isinstance(df, dict):
+        df = pd.concat(df.values(), ignore_index=True) if df else pd.DataFrame()
+        all_columns = list(dict.fromkeys(all_columns))
+    return _finish_order_frame(df), all_columns
+
+def read_csv_orders(
+    path: Union[str, BinaryIO],
+    usecols: Optional[List[str]] = READ_COLUMNS
+) -> Tuple[pd.DataFrame, List[Any]]:
+    """CSV를 읽어 (필요한 열만 담은 DataFrame, 전체 열 목록) 반환 (인코딩은 CSV_ENCODINGS 순서로 시도)"""
+    for encoding in CSV_ENCODINGS:
+        try:
+            # pyarrow 엔진은 usecols에 함수를 받지 않으므로 헤더만 먼저 읽어 열 목록을 구함
+            all_columns = list(pd.read_csv(_rewind(path), nrows=0, encoding=encoding).columns)
+            columns = [column for column in all_columns if usecols is None or column in usecols]
+            df = pd.read_csv(
+                _rewind(path),
+                engine=CSV_ENGINE,
+                encoding=encoding,
+                usecols=columns,
+                dtype={column: str for column in TEXT_COLUMNS if column in columns}
+            )
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError(f"CSV 인코딩을 알 수 없습니다 (시도: {', '.join(CSV_ENCODINGS)})")
+    return _finish_order_frame(df), all_columns
+
+def read_parquet_orders(
+    path: Union[str, BinaryIO],
+    usecols: Optional[List[str]] = READ_COLUMNS
+) -> Tuple[pd.DataFrame, List[Any]]:
+    """Parquet을 읽어 (필요한 열만 담은 DataFrame, 전체 열 목록) 반환 (필요한 열만 디스크에서 읽음)"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet 파일을 읽으려면 pyarrow가 필요합니다.")
+    
+    parquet_file = pq.ParquetFile(_rewind(path))
+    # pandas가 저장한 인덱스 열은 데이터 열이 아님
+    all_columns = [
+        column for column in parquet_file.schema_arrow.names
+        if not column.startswith('__index_level_')
+    ]
+    columns = [column for column in all_columns if usecols is None or column in usecols]
+    df = parquet_file.read(columns=columns).to_pandas()
+    for column in TEXT_COLUMNS:
+        if column in df.columns:
+            df[column] = _as_text(df[column])
+    return _finish_order_frame(df), all_columns
+
+def read_order_file(
+    path: Union[str, BinaryIO],
+    file_format: Optional[str] = None,
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None,
+    usecols: Optional[List[str]] = READ_COLUMNS
+) -> Tuple[pd.DataFrame, List[Any]]:
+    """형식에 맞는 읽기 함수로 주문 파일을 읽기 (형식을 모르면 내용과 확장자로 판별, usecols가 None이면 모든 열)"""
+    if file_format is None:
+        file_format = _source_format(path)
+    if file_format == 'csv':
+        return read_csv_orders(path, usecols)
+    if file_format == 'parquet':
+        return read_parquet_orders(path, usecols)
+    if file_format is None:
+        raise ValueError("지원하지 않는 파일 형식입니다 (엑셀, CSV, Parquet만 가능).")
+    return read_excel_orders(path, usecols, sheets)
+
+# 읽은 DataFrame 압축 설정 (COMPACT_FRAMES=0 이면 읽은 그대로 사용)
+COMPACT_FRAMES = os.environ.get('COMPACT_FRAMES', '1') == '1'
+# 고유값 비율이 이보다 낮은 문자열 열은 category로 인코딩
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """반복이 많은 문자열 열은 category로, 소수점 없는 금액 열은 작은 정수형으로 줄이고 빈 열은 제거
+    
+    실수 열은 금액 정밀도를 위해 float64를 유지하고, 빈 값이 없는 정수 값만 정수형으로 바꾼다.
+    압축 전 크기는 df.attrs['bytesBeforeCompaction']에 남겨 메모리 보고에 쓴다.
+    """
+    bytes_before = int(df.memory_usage(deep=True).sum())
+    
+    # 헤더 없는 완전히 빈 열 (엑셀 서식만 남은 열)
+    empty_columns = [
+        column for column in df.columns
+        if str(column).startswith('Unnamed:') and df[column].isna().all()
+    ]
+    df = df.drop(columns=empty_columns)
+    
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            if values.notna().all() and (pd.api.types.is_integer_dtype(values) or (values % 1 == 0).all()):
+                df[column] = pd.to_numeric(values.astype('int64'), downcast='integer')
+        elif (
+            (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values))
+            and len(values) > 0
+            and values.nunique(dropna=True) / len(values) < CATEGORY_MAX_UNIQUE_RATIO
+        ):
+            df[column] = values.astype('category')
+    
+    df.attrs['bytesBeforeCompaction'] = bytes_before
+    return df
+
+def frame_memory_report(df: pd.DataFrame) -> Dict[str, Any]:
+    """DataFrame의 열별 dtype과 메모리 사용량 (압축 전 크기 포함)"""
+    usage = df.memory_usage(deep=True)
+    total = int(usage.sum())
+    return {
+        'rows': len(df),
+        'bytes': total,
+        'bytesBeforeCompaction': int(df.attrs.get('bytesBeforeCompaction', total)),
+        'columns': {
+            str(column): {'dtype': str(df[column].dtype), 'bytes': int(usage[column])}
+            for column in df.columns
+        }
+    }
+
+# 두 파일 병렬 로드 설정 (PARALLEL_LOAD=0 이면 기존처럼 순차 로드)
+PARALLEL_LOAD = os.environ.get('PARALLEL_LOAD', '1' if (os.cpu_count() or 1) > 1 else '0') == '1'
+LOAD_WORKERS = int(os.environ.get('LOAD_WORKERS', '2'))
+
+_load_pool: Optional[ProcessPoolExecutor] = None
+_load_pool_lock = threading.Lock()
+
+def _load_pool_context() -> multiprocessing.context.BaseContext:
+    """워커 시작 방식: 스레드가 여럿인 서버 프로세스를 fork하지 않도록 forkserver(없으면 spawn)"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def _get_load_pool() -> ProcessPoolExecutor:
+    """파일 로드용 프로세스 풀 (최초 사용 시 생성 후 재사용, 여러 실행기 스레드에서 동시에 불려도 하나만)"""
+    global _load_pool
+    with _load_pool_lock:
+        if _load_pool is None:
+            _load_pool = ProcessPoolExecutor(max_workers=LOAD_WORKERS, mp_context=_load_pool_context())
+        return _load_pool
+
+def load_order_files(
+    paths: List[Union[str, BinaryIO]],
+    parallel: Optional[bool] = None,
+    file_formats: Optional[List[Optional[str]]] = None,
+    sheets: Optional[Union[str, Tuple[str, ...]]] = None,
+    usecols: Optional[List[str]] = READ_COLUMNS
+) -> List[Tuple[pd.DataFrame, List[Any]]]:
+    """여러 파일을 순차 또는 프로세스 풀에서 동시에 읽기 (file_formats가 없으면 파일마다 형식 판별)"""
+    if parallel is None:
+        parallel = PARALLEL_LOAD and not is_profiling()
+    if file_formats is None:
+        file_formats = [None] * len(paths)
+    if not parallel or len(paths) < 2:
+        return [read_order_file(path, file_format, sheets, usecols) for path, file_format in zip(paths, file_formats)]
+    
+    # 결과는 풀이 한 번만 pickle해서 돌려줌 (워커에서 미리 bytes로 만들면 두 번 직렬화됨)
+    pool = _get_load_pool()
+    return list(pool.map(read_order_file, paths, file_formats, [sheets] * len(paths), [usecols] * len(paths)))
+
+def shutdown_load_pool():
+    if _load_pool is not None:
+        _load_pool.shutdown(wait=False, cancel_futures=True)
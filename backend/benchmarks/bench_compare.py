@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+ExcelComparator 마이크로 벤치마크
+
+합성 데이터(generate_orders.py)로 파일 읽기, 비교기 생성, 각 get_* 분석, CSV 내보내기를 따로 잰다.
+결과는 커밋 해시와 라이브러리 버전을 담아 results/ 에 JSON으로 저장하고, --baseline 으로 이전 결과와 비교한다.
+
+사용 예 (backend 디렉터리에서):
+    python benchmarks/bench_compare.py --rows 10000 100000
+    python benchmarks/bench_compare.py --rows 10000 --baseline benchmarks/results/20260101-120000-abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+import pandas as pd
+
+from app import main, readers
+from generate_orders import generate_pair, write_orders
+
+# 비교기마다 새로 만들어 재는 분석 (메모이즈된 결과를 재지 않도록)
+# 서비스처럼 분석 열(READ_COLUMNS)만 읽은 표로 비교기를 만들고, 모든 열이 필요한 분석은 처음 호출할 때 모든 열로 바꾼다
+ANALYSES: Dict[str, Callable[[Any], Any]] = {
+    'get_summary': lambda c: c.get_summary(),
+    'get_column_comparison': lambda c: c.get_column_comparison(),
+    'get_amount_differences': lambda c: c.get_amount_differences(),
+    'get_shipping_differences': lambda c: c.get_shipping_differences(),
+    'get_exclusive_orders': lambda c: c.get_exclusive_orders(),
+    'get_field_differences': lambda c: c.get_field_differences(),
+    'get_line_difference_frames': lambda c: c.get_line_difference_frames(),
+    'get_memory_report': lambda c: c.get_memory_report(),
+    'export_differences_to_csv': lambda c: c.export_differences_to_csv(),
+    'compare_json': lambda c: json.dumps(c.compare(), ensure_ascii=False)
+}
+
+def measure(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """repeat번 실행해 최소/중앙값/최대 시간(초) 반환 (setup 결과를 func 인자로 넘기고 setup 시간은 빼고 잼)"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        func(arg) if setup is not None else func()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'max': max(times)}
+
+def prepare_files(rows: int, overlap: float, diff_rate: float, file_format: str, data_dir: str) -> List[str]:
+    """조건별 합성 파일을 만들고 경로 반환 (같은 조건의 파일이 있으면 재사용)"""
+    os.makedirs(data_dir, exist_ok=True)
+    paths = [
+        os.path.join(data_dir, f'orders_{rows}_{overlap}_{diff_rate}_{index}.{file_format}')
+        for index in [1, 2]
+    ]
+    if not all(os.path.exists(path) for path in paths):
+        print(f'  데이터 생성: {rows}행 ({file_format})', flush=True)
+        for df, path in zip(generate_pair(rows, overlap, diff_rate), paths):
+            write_orders(df, path)
+    return paths
+
+def run_suite(rows: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """한 가지 크기에 대해 단계별 시간 측정"""
+    paths = prepare_files(rows, args.overlap, args.diff_rate, args.format, args.data_dir)
+    timings = {}
+    
+    # 비교 요청의 파싱 (분석 열만)과 필드·행 단위 분석 전의 파싱 (모든 열)
+    for index, path in enumerate(paths, start=1):
+        timings[f'parse.file{index}'] = measure(lambda: readers.read_order_file(path), args.repeat)
+        timings[f'parseAllColumns.file{index}'] = measure(
+            lambda: readers.read_order_file(path, usecols=None), args.repeat
+        )
+        for stage in ['parse', 'parseAllColumns']:
+            print(f'  {stage}.file{index}: {timings[f"{stage}.file{index}"]["median"]:.3f}s', flush=True)
+    
+    loaded = [readers.read_order_file(path) for path in paths]
+    loaded_all_columns = [readers.read_order_file(path, usecols=None) for path in paths]
+    timings['build_index'] = measure(lambda: main.ExcelComparator.from_frames(*loaded), args.repeat)
+    
+    # 필드·행 단위 분석에는 모든 열로 바꾸는 시간도 포함 (파싱 시간은 parseAllColumns로 따로 잼)
+    def build_comparator() -> main.ExcelComparator:
+        comparator = main.ExcelComparator.from_frames(*loaded)
+        comparator.defer_all_columns(lambda: loaded_all_columns)
+        return comparator
+    
+    for name, analysis in ANALYSES.items():
+        timings[name] = measure(analysis, args.repeat, setup=build_comparator)
+        print(f'  {name}: {timings[name]["median"]:.3f}s', flush=True)
+    
+    return {
+        'rows': rows,
+        'files': [{'path': os.path.basename(path), 'bytes': os.path.getsize(path)} for path in paths],
+        'timings': timings
+    }
+
+def git_revision() -> Dict[str, Any]:
+    """현재 커밋 해시와 작업 트리 변경 여부"""
+    def git(*command: str) -> str:
+        return subprocess.run(
+            ['git', *command], cwd=BENCH_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    return {'commit': git('rev-parse', '--short', 'HEAD') or None, 'dirty': bool(git('status', '--porcelain'))}
+
+def library_versions() -> Dict[str, Optional[str]]:
+    versions = {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__}
+    for module in ['openpyxl', 'python_calamine', 'pyarrow']:
+        try:
+            versions[module] = __import__(module).__version__
+        except (ImportError, AttributeError):
+            versions[module] = None
+    return versions
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """두 결과의 단계별 중앙값 비교 표 출력 (비율 > 1 이면 느려짐)"""
+    print(f"\n기준: {baseline['git']['commit']} ({baseline['createdAt']})  ->  현재: {current['git']['commit']}")
+    baseline_suites = {suite['rows']: suite for suite in baseline['suites']}
+    for suite in current['suites']:
+        base = baseline_suites.get(suite['rows'])
+        if base is None:
+            continue
+        print(f"\n[{suite['rows']}행]")
+        print(f"{'단계':<30}{'기준(s)':>10}{'현재(s)':>10}{'비율':>8}")
+        for stage, timing in suite['timings'].items():
+            if stage not in base['timings']:
+                continue
+            before = base['timings'][stage]['median']
+            after = timing['median']
+            ratio = after / before if before > 0 else float('nan')
+            print(f"{stage:<30}{before:>10.4f}{after:>10.4f}{ratio:>8.2f}")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description='ExcelComparator 단계별 벤치마크')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='파일별 행 수 (1000000도 가능)')
+    parser.add_argument('--overlap', type=float, default=0.9, help='두 파일에 함께 있는 주문 비율')
+    parser.add_argument('--diff-rate', type=float, default=0.05, help='공통 주문 중 값이 다른 주문 비율')
+    parser.add_argument('--format', choices=['xlsx', 'csv', 'parquet'], default='xlsx')
+    parser.add_argument('--repeat', type=int, default=3, help='단계별 반복 횟수 (중앙값 기록)')
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, 'data'), help='합성 데이터 보관 위치')
+    parser.add_argument('--results-dir', default=os.path.join(BENCH_DIR, 'results'))
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    args = parser.parse_args()
+    
+    suites = []
+    for rows in args.rows:
+        print(f'[{rows}행]', flush=True)
+        suites.append(run_suite(rows, args))
+    
+    result = {
+        'createdAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git': git_revision(),
+        'versions': library_versions(),
+        'settings': {
+            'format': args.format,
+            'overlap': args.overlap,
+            'diffRate': args.diff_rate,
+            'repeat': args.repeat,
+            'excelEngine': readers.EXCEL_ENGINE,
+            'csvEngine': readers.CSV_ENGINE,
+            'compactFrames': readers.COMPACT_FRAMES
+        },
+        'suites': suites
+    }
+    
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(
+        args.results_dir,
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{result['git']['commit'] or 'nogit'}.json"
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f'\n결과 저장: {path}')
+    
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare_results(result, json.load(f))
+
+if __name__ == '__main__':
+    main_cli()
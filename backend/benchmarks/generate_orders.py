@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+주문 내역 비교용 합성 데이터 생성기
+
+실제 주문 엑셀과 같은 열(주문번호, 수취인명, 상품코드, 판매액, 배송비, 공급단가, 공급가액)로
+두 파일을 만든다. 두 파일에 함께 있는 주문 비율(overlap)과 그중 값이 다른 주문 비율(diff_rate)을 조절할 수 있다.
+
+사용 예:
+    python benchmarks/generate_orders.py --rows 100000 --overlap 0.9 --diff-rate 0.05 --format xlsx -o data
+"""
+import argparse
+import os
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+SURNAMES = list('김이박최정강조윤장임한오서신권황안송류전홍고문양손배백허유남심노하곽성차주우구민진나')
+GIVEN_NAMES = ['민준', '서연', '도윤', '하은', '시우', '지유', '주원', '서윤', '예준', '지민', '하준', '수아', '지호', '채원', '준서', '다은']
+
+# 상품 수와 기준 가격
+CATALOG_SIZE = 2000
+FREE_SHIPPING_AMOUNT = 50000
+SHIPPING_FEE = 3000
+
+def generate_orders(rows: int, seed: int = 0, first_order_no: int = 1) -> pd.DataFrame:
+    """주문당 1~4개 상품 행으로 rows개 행의 주문 내역 생성 (주문번호는 first_order_no부터 연속)"""
+    rng = np.random.default_rng(seed)
+    
+    # 주문별 상품 행 수 -> 행별 주문 번호
+    lines_per_order = rng.integers(1, 5, size=rows)
+    order_ids = np.repeat(np.arange(rows), lines_per_order)[:rows]
+    n_orders = int(order_ids[-1]) + 1 if rows else 0
+    is_first_line = np.r_[True, order_ids[1:] != order_ids[:-1]][:rows]
+    
+    catalog_prices = rng.integers(10, 300, size=CATALOG_SIZE) * 100
+    products = rng.integers(0, CATALOG_SIZE, size=rows)
+    quantities = rng.choice([1, 1, 1, 1, 2, 2, 3], size=rows)
+    sales = catalog_prices[products] * quantities
+    unit_costs = (catalog_prices[products] * rng.uniform(0.55, 0.8, size=rows)).round(-1).astype(np.int64)
+    
+    # 주문 합계가 무료배송 기준 미만이면 첫 행에만 배송비
+    order_totals = np.bincount(order_ids, weights=sales, minlength=n_orders)
+    shipping = np.where(is_first_line & (order_totals[order_ids] < FREE_SHIPPING_AMOUNT), SHIPPING_FEE, 0)
+    
+    names = np.char.add(
+        np.array(SURNAMES)[rng.integers(0, len(SURNAMES), size=n_orders)],
+        np.array(GIVEN_NAMES)[rng.integers(0, len(GIVEN_NAMES), size=n_orders)]
+    )
+    order_dates = pd.Timestamp('2026-01-01') + pd.to_timedelta(
+        np.sort(rng.integers(0, 30 * 24 * 3600, size=n_orders)), unit='s'
+    )
+    
+    return pd.DataFrame({
+        '주문번호': (np.arange(n_orders) + first_order_no).astype(str)[order_ids],
+        '주문일시': order_dates[order_ids],
+        '수취인명': names[order_ids],
+        '상품코드': np.char.add('P', np.char.zfill(products.astype(str), 5)),
+        '수량': quantities,
+        '판매액': sales,
+        '배송비': shipping,
+        '공급단가': unit_costs,
+        '공급가액': unit_costs * quantities
+    })
+
+def generate_pair(
+    rows: int,
+    overlap: float = 0.9,
+    diff_rate: float = 0.05,
+    seed: int = 0
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """비교할 두 파일 생성
+    
+    파일1 주문 중 overlap 비율은 파일2에도 있고, 나머지는 파일2에만 있는 새 주문으로 채워 행 수를 맞춘다.
+    공통 주문 중 diff_rate 비율은 배송비를 바꾸고, 그중 절반은 첫 행의 판매액도 바꾼다.
+    """
+    rng = np.random.default_rng(seed + 1)
+    df1 = generate_orders(rows, seed=seed)
+    
+    order_nos = df1['주문번호'].unique()
+    shared = rng.choice(order_nos, size=int(len(order_nos) * overlap), replace=False)
+    df2 = df1[df1['주문번호'].isin(shared)].copy()
+    
+    # 공통 주문 중 일부만 값 변경 (주문의 첫 행 기준)
+    changed = rng.choice(shared, size=int(len(shared) * diff_rate), replace=False) if len(shared) else shared
+    first_lines = ~df2['주문번호'].duplicated()
+    in_changed = df2['주문번호'].isin(changed) & first_lines
+    df2.loc[in_changed, '배송비'] = np.where(df2.loc[in_changed, '배송비'] > 0, 0, SHIPPING_FEE)
+    amount_changed = df2['주문번호'].isin(changed[: len(changed) // 2]) & first_lines
+    df2.loc[amount_changed, '판매액'] = (df2.loc[amount_changed, '판매액'] * 1.1).round(-1).astype(np.int64)
+    
+    # 파일2에만 있는 주문 (주문번호가 겹치지 않는 범위)
+    extra_rows = rows - len(df2)
+    if extra_rows > 0:
+        extra = generate_orders(extra_rows, seed=seed + 2, first_order_no=len(order_nos) + 1)
+        df2 = pd.concat([df2, extra], ignore_index=True)
+    
+    return df1.reset_index(drop=True), df2.reset_index(drop=True)
+
+def write_orders(df: pd.DataFrame, path: str):
+    """확장자에 맞는 형식으로 저장 (xlsx, csv, parquet)"""
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+    elif path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description='주문 내역 비교용 합성 데이터 생성')
+    parser.add_argument('--rows', type=int, default=10000, help='파일별 행 수 (예: 10000, 100000, 1000000)')
+    parser.add_argument('--overlap', type=float, default=0.9, help='두 파일에 함께 있는 주문 비율')
+    parser.add_argument('--diff-rate', type=float, default=0.05, help='공통 주문 중 값이 다른 주문 비율')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=['xlsx', 'csv', 'parquet'], default='xlsx')
+    parser.add_argument('-o', '--output-dir', default='.')
+    args = parser.parse_args()
+    
+    df1, df2 = generate_pair(args.rows, args.overlap, args.diff_rate, args.seed)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for index, df in enumerate([df1, df2], start=1):
+        path = os.path.join(args.output_dir, f'orders_{args.rows}_{index}.{args.format}')
+        write_orders(df, path)
+        print(f'{path}: {len(df)}행, 주문 {df["주문번호"].nunique()}건')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+from generate_orders import generate_pair, write_orders
+
+def save_pair(directory, frames):
+    """두 표를 xlsx로 저장하고 경로 목록 반환"""
+    paths = []
+    for index, df in enumerate(frames, start=1):
+        path = str(directory / f'orders_{index}.xlsx')
+        write_orders(df, path)
+        paths.append(path)
+    return paths
+
+@pytest.fixture(scope='session')
+def order_frames():
+    """합성 주문 두 파일 (공통 주문 80%, 그중 20%는 배송비·판매액이 다름)"""
+    return generate_pair(600, overlap=0.8, diff_rate=0.2, seed=7)
+
+@pytest.fixture(scope='session')
+def order_files(order_frames, tmp_path_factory):
+    """order_frames를 xlsx로 저장한 경로 (파일1, 파일2)"""
+    return save_pair(tmp_path_factory.mktemp('orders'), order_frames)
+
+@pytest.fixture(scope='session')
+def blank_name_files(order_frames, tmp_path_factory):
+    """일부 행의 수취인명과 상품코드를 비운 order_frames의 xlsx 경로"""
+    frames = [df.copy() for df in order_frames]
+    for df in frames:
+        df.loc[df.index % 17 == 0, '수취인명'] = None
+        df.loc[df.index % 13 == 0, '상품코드'] = None
+    return save_pair(tmp_path_factory.mktemp('blank-names'), frames)
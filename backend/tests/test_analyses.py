@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import ExcelComparator, MultiExcelComparator, app
+from app.readers import read_order_file
+
+def orders(rows):
+    """(주문번호, 상품코드, 판매액, 배송비, 수량) 행으로 주문 표 생성"""
+    return pd.DataFrame(rows, columns=['주문번호', '상품코드', '판매액', '배송비', '수량']).assign(수취인명='홍길동')
+
+def save_csv(df, path):
+    df.to_csv(path, index=False, encoding='utf-8-sig')
+    return str(path)
+
+def load(df, tmp_path, name):
+    """CSV로 저장했다가 모든 열로 다시 읽은 (DataFrame, 열 목록)"""
+    return read_order_file(save_csv(df, tmp_path / f'{name}.csv'), usecols=None)
+
+FILE1 = orders([
+    ('1', 'P1', 1000, 3000, 1),
+    ('1', 'P1', 2000, 0, 1),
+    ('1', 'P2', 500, 0, 2),
+    ('2', 'P3', 1000, 0, 1),
+    ('3', 'P4', 700, 3000, 1)
+])
+FILE2 = orders([
+    ('1', 'P1', 1000, 3000, 1),
+    ('1', 'P1', 2500, 0, 1),
+    ('1', 'P2', 500, 0, 2),
+    ('1', 'P5', 100, 0, 1),
+    ('2', 'P3', 1005, 0, 1),
+    ('4', 'P4', 700, 3000, 1)
+])
+
+@pytest.fixture
+def comparator(tmp_path):
+    return ExcelComparator.from_frames(load(FILE1, tmp_path, 'a'), load(FILE2, tmp_path, 'b'))
+
+def test_field_differences_with_tolerances(comparator):
+    differences = comparator.get_field_difference_frame()
+    assert sorted(zip(differences['orderNo'], differences['field'], differences['difference'])) == [
+        ('1', '수량', -1), ('1', '판매액', -600), ('2', '판매액', -5)
+    ]
+    # 한쪽에만 있는 주문(3, 4)은 제외
+    assert set(differences['orderNo']) == {'1', '2'}
+    
+    assert set(comparator.get_field_difference_frame(abs_tol=10)['orderNo']) == {'1'}
+    # 1% 상대 오차: |1000 - 1005| <= 0.01 * 1005
+    assert set(comparator.get_field_difference_frame(rel_tol=0.01)['orderNo']) == {'1'}
+    assert comparator.get_field_difference_frame(fields=['판매액'])['field'].tolist() == ['판매액', '판매액']
+
+def test_line_differences_pair_repeated_products_in_order(comparator):
+    lines = comparator.get_line_difference_frames()
+    # 같은 주문의 P1 두 행은 등장 순서대로 짝지어 두 번째 행의 판매액만 바뀜
+    changed = lines['changed']
+    assert list(zip(changed['orderNo'], changed['productCode'], changed['occurrence'], changed['field'])) == [
+        ('1', 'P1', 1, '판매액'), ('2', 'P3', 0, '판매액')
+    ]
+    assert changed[['value1', 'value2']].values.tolist() == [[2000, 2500], [1000, 1005]]
+    assert list(zip(lines['added']['orderNo'], lines['added']['productCode'])) == [('1', 'P5'), ('4', 'P4')]
+    assert list(zip(lines['removed']['orderNo'], lines['removed']['productCode'])) == [('3', 'P4')]
+
+def test_session_reads_all_columns_for_field_differences(tmp_path):
+    # 비교 요청은 분석 열만 읽고, 필드별 차이를 처음 조회할 때 수량 열까지 다시 읽음
+    client = TestClient(app)
+    path1, path2 = save_csv(FILE1, tmp_path / 'a.csv'), save_csv(FILE2, tmp_path / 'b.csv')
+    with open(path1, 'rb') as f1, open(path2, 'rb') as f2:
+        session_id = client.post('/api/compare', files={'file1': ('a.csv', f1), 'file2': ('b.csv', f2)}).json()['sessionId']
+    
+    result = client.get(f'/api/sessions/{session_id}/field-differences').json()
+    assert '수량' in result['fields']
+    assert {(item['orderNo'], item['field']) for item in result['items']} == {('1', '수량'), ('1', '판매액'), ('2', '판매액')}
+    client.delete(f'/api/sessions/{session_id}')
+
+def test_multi_file_presence_and_reference_tolerances(tmp_path):
+    file3 = orders([
+        ('1', 'P1', 3000, 3000, 2),
+        ('1', 'P2', 550, 0, 2),
+        ('2', 'P3', 1000, 0, 1),
+        ('4', 'P4', 750, 3000, 1)
+    ])
+    comparator = MultiExcelComparator.from_frames([
+        load(df, tmp_path, name) for df, name in [(FILE1, 'a'), (FILE2, 'b'), (file3, 'c')]
+    ])
+    
+    presence = comparator.get_presence_frame().set_index('orderNo')
+    assert presence['fileCount'].to_dict() == {'1': 3, '2': 3, '3': 1, '4': 2}
+    assert presence.loc['4', ['file1', 'file2', 'file3']].tolist() == [False, True, True]
+    summary = comparator.get_summary()
+    assert summary['ordersInAllFiles'] == 2 and summary['ordersMissingSomewhere'] == 2
+    
+    differences = comparator.get_reference_difference_frame(reference=0)
+    assert sorted(zip(differences['file'], differences['orderNo'], differences['field'], differences['difference'])) == [
+        ('file2', '1', '수량', 1), ('file2', '1', '판매액', 600), ('file2', '2', '판매액', 5),
+        ('file3', '1', '판매액', 50)
+    ]
+    # 기준 파일을 바꾸면 파일1에 없던 주문 4도 기준과 함께 있는 파일끼리 비교됨
+    by_file2 = comparator.get_reference_difference_frame(reference=1)
+    assert by_file2.loc[by_file2['orderNo'] == '4', ['file', 'difference']].values.tolist() == [['file3', 50]]
+    tolerant = comparator.get_reference_difference_frame(reference=0, abs_tol=10)
+    assert sorted(zip(tolerant['file'], tolerant['field'])) == [('file2', '판매액'), ('file3', '판매액')]
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.main import (
+    AggregatedComparator,
+    create_baseline,
+    frame_aggregates,
+    update_baseline
+)
+from generate_orders import SHIPPING_FEE, generate_orders
+
+def aggregates(df):
+    return frame_aggregates(df, list(df.columns))
+
+def next_version(df, seed):
+    """배송비를 바꾸고 일부 주문을 빼고 새 주문을 더한 다음 버전 파일"""
+    rng = np.random.default_rng(seed)
+    order_nos = df['주문번호'].unique()
+    removed = rng.choice(order_nos, size=len(order_nos) // 20, replace=False)
+    changed = rng.choice(order_nos, size=len(order_nos) // 10, replace=False)
+    
+    df = df[~df['주문번호'].isin(removed)].copy()
+    first_lines = ~df['주문번호'].duplicated()
+    in_changed = df['주문번호'].isin(changed) & first_lines
+    df.loc[in_changed, '배송비'] = np.where(df.loc[in_changed, '배송비'] > 0, 0, SHIPPING_FEE)
+    extra = generate_orders(40, seed=seed, first_order_no=100000 + seed * 1000)
+    return pd.concat([df, extra], ignore_index=True)
+
+@pytest.mark.parametrize('side', [0, 1])
+def test_incremental_update_matches_full_recompute(order_frames, side):
+    frames = list(order_frames)
+    baseline = create_baseline('test', (aggregates(frames[0]), aggregates(frames[1])), ('a', 'b'))
+    
+    for version in range(1, 3):
+        frames[side] = next_version(frames[side], seed=version)
+        baseline = update_baseline(baseline, {side: (aggregates(frames[side]), f'v{version}')})
+        full = AggregatedComparator(aggregates(frames[0]), aggregates(frames[1]))
+        
+        expected = full.get_shipping_difference_frame()
+        assert len(baseline.delta) > 0
+        pd.testing.assert_frame_equal(
+            baseline.shipping.sort_values('orderNo', ignore_index=True),
+            expected.sort_values('orderNo', ignore_index=True)
+        )
+        assert baseline.shipping['difference'].abs().tolist() == expected['difference'].abs().tolist()
+
+def test_update_with_same_digest_is_skipped(order_frames):
+    baseline = create_baseline('test', tuple(aggregates(df) for df in order_frames), ('a', 'b'))
+    updated = update_baseline(baseline, {1: (aggregates(order_frames[0]), 'b')})
+    assert updated.changed_orders == {}
+    pd.testing.assert_frame_equal(updated.shipping, baseline.shipping, check_dtype=False)
@@ -0,0 +1,85 @@
+import io
+import zipfile
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app import jobs, main
+from app.main import ExcelComparator, app
+from app.readers import read_excel_orders
+
+def zip_bytes(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_batch_compares_each_folder_pair(order_files, monkeypatch):
+    # 쌍마다 실행 중인 비교 작업으로 세는지 확인
+    seen_pending = []
+    compare_pair = main._compare_batch_pair
+    
+    def counted_compare_pair(*args, **kwargs):
+        seen_pending.append(jobs.pending_jobs())
+        return compare_pair(*args, **kwargs)
+    
+    monkeypatch.setattr(main, '_compare_batch_pair', counted_compare_pair)
+    
+    file1, file2 = [read_bytes(path) for path in order_files]
+    archive = zip_bytes({
+        'storeA/orders_1.xlsx': file1,
+        'storeA/orders_2.xlsx': file2,
+        # 같은 파일끼리는 차이가 없음
+        'storeB/orders_1.xlsx': file1,
+        'storeB/orders_2.xlsx': file1,
+        # 파일이 하나뿐인 폴더는 쌍이 아님
+        'storeC/orders_1.xlsx': file1
+    })
+    client = TestClient(app)
+    response = client.post('/api/compare-batch', files={'archive': ('batch.zip', archive)})
+    assert response.status_code == 200
+    result = response.json()
+    assert result['counts'] == {'total': 2, 'ok': 2, 'error': 0}
+    
+    expected = ExcelComparator.from_frames(*[read_excel_orders(path) for path in order_files]).compare(summary_only=True)
+    pairs = {item['name']: item for item in result['pairs']}
+    assert pairs['storeA']['summary'] == expected['summary']
+    assert pairs['storeA']['differences']['shippingFeeCount'] == expected['differences']['shippingFeeCount']
+    assert pairs['storeB']['differences']['shippingFeeCount'] == 0
+    assert len(seen_pending) == 2 and min(seen_pending) >= 1
+    assert jobs.pending_jobs() == 0
+    
+    download = client.get(f"/api/batches/{result['batchId']}/download")
+    with zipfile.ZipFile(io.BytesIO(download.content)) as zf:
+        names = set(zf.namelist())
+        summary = pd.read_csv(zf.open('summary.csv'), encoding='utf-8-sig')
+    assert {'summary.csv', '001_storeA/shippingFee.csv', '002_storeB/shippingFee.csv'} <= names
+    assert summary['name'].tolist() == ['storeA', 'storeB']
+
+def test_batch_with_manifest_reports_failed_pairs(order_files):
+    file1, file2 = [read_bytes(path) for path in order_files]
+    manifest = 'name,file1,file2\n월말,a.xlsx,b.xlsx\n깨진 파일,a.xlsx,broken.xlsx\n'
+    client = TestClient(app)
+    response = client.post('/api/compare-batch', files=[
+        ('files', ('a.xlsx', file1)),
+        ('files', ('b.xlsx', file2)),
+        ('files', ('broken.xlsx', b'not an excel file')),
+        ('manifest', ('manifest.csv', manifest.encode('utf-8')))
+    ])
+    assert response.status_code == 200
+    result = response.json()
+    assert result['counts'] == {'total': 2, 'ok': 1, 'error': 1}
+    assert [item['status'] for item in result['pairs']] == ['ok', 'error']
+    
+    # 매니페스트에 없는 파일은 요청 전체를 거부
+    response = client.post('/api/compare-batch', files=[
+        ('files', ('a.xlsx', file1)),
+        ('manifest', ('manifest.csv', b'file1,file2\na.xlsx,missing.xlsx\n'))
+    ])
+    assert response.status_code == 400
+    assert 'missing.xlsx' in response.json()['detail']
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from app.caches import DiskCache, SessionStore
+from app.main import ExcelComparator
+from app.readers import frame_memory_report, read_excel_orders
+
+def test_sessions_are_evicted_by_size():
+    store = SessionStore(60, max_sessions=10, max_bytes=100, sizeof=len)
+    first = store.create(b'x' * 40)
+    second = store.create(b'x' * 40)
+    assert store.get(first) is not None
+    # 예산을 넘으면 가장 오래 사용하지 않은 세션(second)부터 제거
+    third = store.create(b'x' * 40)
+    assert store.get(second) is None
+    assert store.get(first) is not None and store.get(third) is not None
+    # 예산보다 큰 세션도 만들어지지만 나머지는 모두 제거
+    large = store.create(b'x' * 200)
+    assert store.get(large) is not None
+    assert store.stats()['items'] == 1
+
+def test_comparator_size_includes_memoized_results(order_files):
+    comparator = ExcelComparator.from_frames(*[read_excel_orders(path) for path in order_files])
+    before = comparator.memory_bytes()
+    assert before >= comparator.get_memory_report()['totalBytes']
+    comparator.get_line_difference_frames()
+    assert comparator.memory_bytes() > before
+
+def test_disk_cache_round_trip(order_files, tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = DiskCache(str(tmp_path), 1024 * 1024 * 1024)
+    df, columns = read_excel_orders(order_files[0])
+    key = ('digest', None, None)
+    assert cache.get(key) is None
+    cache.put(key, (df, columns))
+    
+    cached_df, cached_columns = cache.get(key)
+    pd.testing.assert_frame_equal(cached_df, df)
+    assert cached_columns == columns
+    # 압축 전 크기도 그대로 남아 메모리 보고의 절감량이 유지됨
+    assert cached_df.attrs['bytesBeforeCompaction'] == df.attrs['bytesBeforeCompaction']
+    assert frame_memory_report(cached_df)['bytesBeforeCompaction'] == df.attrs['bytesBeforeCompaction']
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
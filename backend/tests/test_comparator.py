@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+from app.main import CSV_CHUNK_ROWS, ExcelComparator, iter_csv
+from app.readers import read_excel_orders
+
+# 행 단위 반복으로 계산하던 이전 구현 (결과가 바뀌지 않았는지 비교하는 기준)
+
+def reference_exclusive_orders(df1, df2):
+    orders1 = set(df1['주문번호'].astype(str).unique())
+    orders2 = set(df2['주문번호'].astype(str).unique())
+    result = {}
+    for side, df, order_nos in [('onlyInFile1', df1, orders1 - orders2), ('onlyInFile2', df2, orders2 - orders1)]:
+        result[side] = []
+        for order_no in order_nos:
+            df_order = df[df['주문번호'].astype(str) == order_no]
+            first_row = df_order.iloc[0]
+            result[side].append({
+                'orderNo': order_no,
+                'customerName': first_row.get('수취인명', ''),
+                'productCount': len(df_order),
+                'totalAmount': float(df_order['판매액'].sum()),
+                'products': ', '.join(df_order['상품코드'].tolist())
+            })
+    return result
+
+def reference_shipping_differences(df1, df2):
+    shipping1 = df1.groupby('주문번호')['배송비'].sum().reset_index()
+    shipping1.columns = ['orderNo', 'shippingFee1']
+    shipping2 = df2.groupby('주문번호')['배송비'].sum().reset_index()
+    shipping2.columns = ['orderNo', 'shippingFee2']
+    
+    merged = pd.merge(shipping1, shipping2, on='orderNo', how='outer')
+    merged['shippingFee1'] = merged['shippingFee1'].fillna(0)
+    merged['shippingFee2'] = merged['shippingFee2'].fillna(0)
+    merged['difference'] = merged['shippingFee1'] - merged['shippingFee2']
+    
+    result = []
+    for _, row in merged[merged['difference'] != 0].iterrows():
+        order_no = row['orderNo']
+        customer_name = ''
+        product_count1 = product_count2 = 0
+        df1_order = df1[df1['주문번호'] == order_no]
+        if not df1_order.empty:
+            customer_name = df1_order.iloc[0]['수취인명']
+            product_count1 = len(df1_order)
+        df2_order = df2[df2['주문번호'] == order_no]
+        if not df2_order.empty:
+            if not customer_name:
+                customer_name = df2_order.iloc[0]['수취인명']
+            product_count2 = len(df2_order)
+        result.append({
+            'orderNo': str(order_no),
+            'customerName': customer_name,
+            'shippingFee1': float(row['shippingFee1']),
+            'shippingFee2': float(row['shippingFee2']),
+            'difference': float(row['difference']),
+            'productCount1': product_count1,
+            'productCount2': product_count2
+        })
+    return sorted(result, key=lambda x: abs(x['difference']), reverse=True)
+
+def by_order_no(records):
+    return sorted(records, key=lambda record: record['orderNo'])
+
+@pytest.fixture(scope='module')
+def raw_frames(order_files):
+    # 이전 구현도 주문번호를 문자열로 읽은 경우와 비교 (숫자로 읽으면 외부 병합 후 '10.0'이 됨)
+    return [pd.read_excel(path, sheet_name=0, dtype={'주문번호': str}) for path in order_files]
+
+@pytest.fixture(scope='module')
+def comparator(order_files):
+    return ExcelComparator.from_frames(*[read_excel_orders(path) for path in order_files])
+
+def test_exclusive_orders_match_row_loop(comparator, raw_frames):
+    expected = reference_exclusive_orders(*raw_frames)
+    result = comparator.get_exclusive_orders()
+    assert result['onlyInFile1'] or result['onlyInFile2']
+    for side in expected:
+        assert by_order_no(result[side]) == by_order_no(expected[side])
+
+def test_shipping_differences_match_row_loop(comparator, raw_frames):
+    expected = reference_shipping_differences(*raw_frames)
+    result = comparator.get_shipping_differences()
+    assert result
+    assert by_order_no(result) == by_order_no(expected)
+    # 같은 차이끼리의 순서는 주문번호 정렬 방식에 따라 다를 수 있으므로 차이 크기 순서만 비교
+    assert [abs(item['difference']) for item in result] == [abs(item['difference']) for item in expected]
+
+@pytest.mark.parametrize('chunk_rows', [CSV_CHUNK_ROWS, 7])
+def test_csv_export_bytes_unchanged(comparator, chunk_rows):
+    records = comparator.get_shipping_differences()
+    expected = pd.DataFrame(records).to_csv(index=False).encode('utf-8-sig')
+    frame = comparator.get_shipping_difference_frame()
+    assert b''.join(iter_csv(frame, chunk_rows=chunk_rows)) == expected
+    assert comparator.export_differences_to_csv() == expected
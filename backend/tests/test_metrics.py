@@ -0,0 +1,28 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.metrics import RequestMetricsMiddleware, metrics
+
+def requests_in_flight() -> float:
+    return sum(metrics._values['compare_http_requests_in_flight'].values())
+
+def test_streaming_request_is_in_flight_until_body_is_sent():
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+    during_body = []
+    
+    @app.get('/stream')
+    def stream():
+        def body():
+            yield b'first\n'
+            during_body.append(requests_in_flight())
+            yield b'second\n'
+        return StreamingResponse(body())
+    
+    before = requests_in_flight()
+    response = TestClient(app).get('/stream')
+    assert response.text == 'first\nsecond\n'
+    assert 'total;dur=' in response.headers['Server-Timing']
+    assert during_body == [before + 1]
+    assert requests_in_flight() == before
@@ -0,0 +1,35 @@
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from app import main, profiling
+
+def test_cleanup_keeps_recent_reports(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    now = time.time()
+    # 보고서 4개 (0번이 가장 최근, 3번은 보관 기간 초과)
+    for index, age_days in enumerate([0, 1, 2, 30]):
+        for suffix in ['.json', '.prof', '.collapsed.txt']:
+            path = tmp_path / f'{index:032x}{suffix}'
+            path.write_text('')
+            mtime = now - age_days * 24 * 3600
+            os.utime(path, (mtime, mtime))
+    
+    assert profiling.cleanup_profiles(max_reports=2, max_age_days=7) == 2
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        f'{index:032x}{suffix}' for index in [0, 1] for suffix in ['.json', '.prof', '.collapsed.txt']
+    )
+
+def test_profile_token_from_query_or_header(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', 'secret')
+    monkeypatch.setattr(main, 'PROFILE_DIR', str(tmp_path))
+    profile_id = '0' * 32
+    (tmp_path / f'{profile_id}.json').write_text('{"profileId": "%s"}' % profile_id)
+    
+    client = TestClient(main.app)
+    url = f'/api/profiles/{profile_id}'
+    assert client.get(url).status_code == 403
+    assert client.get(url, params={'profile': 'wrong'}).status_code == 403
+    assert client.get(url, params={'profile': 'secret'}).json() == {'profileId': profile_id}
+    assert client.get(url, headers={'X-Profile-Token': 'secret'}).json() == {'profileId': profile_id}
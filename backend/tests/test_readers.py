@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.readers import SheetNotFoundError, read_excel_orders, read_order_file
+from generate_orders import write_orders
+
+@pytest.fixture(scope='module')
+def workbook(order_frames, tmp_path_factory):
+    """파일1 주문을 두 시트(A, B)로 나눠 저장한 xlsx 경로"""
+    df = order_frames[0]
+    path = str(tmp_path_factory.mktemp('sheets') / 'orders.xlsx')
+    with pd.ExcelWriter(path) as writer:
+        df.iloc[:300].to_excel(writer, sheet_name='A', index=False)
+        df.iloc[300:].to_excel(writer, sheet_name='B', index=False)
+    return path
+
+def test_sheet_selection(workbook, order_frames):
+    first, _ = read_excel_orders(workbook)
+    selected, _ = read_excel_orders(workbook, sheets=('B',))
+    every, columns = read_excel_orders(workbook, sheets='*')
+    assert len(first) == 300
+    assert len(selected) == len(order_frames[0]) - 300
+    assert len(every) == len(order_frames[0])
+    assert columns == list(order_frames[0].columns)
+
+def test_missing_sheet_is_rejected(workbook, order_files):
+    with pytest.raises(SheetNotFoundError, match='C'):
+        read_excel_orders(workbook, sheets=('A', 'C'))
+    
+    client = TestClient(app)
+    with open(workbook, 'rb') as f1, open(order_files[1], 'rb') as f2:
+        response = client.post('/api/compare?sheets=A,C', files={'file1': ('a.xlsx', f1), 'file2': ('b.xlsx', f2)})
+    assert response.status_code == 400
+    assert 'C' in response.json()['detail']
+
+def test_sheets_are_rejected_for_csv(order_frames, tmp_path):
+    path = tmp_path / 'orders.csv'
+    order_frames[0].to_csv(path, index=False)
+    client = TestClient(app)
+    with open(path, 'rb') as f1, open(path, 'rb') as f2:
+        response = client.post('/api/compare?sheets=A', files={'file1': ('a.csv', f1), 'file2': ('b.csv', f2)})
+    assert response.status_code == 400
+    assert 'a.csv' in response.json()['detail']
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_csv_and_parquet_read_like_excel(order_frames, order_files, tmp_path, suffix):
+    if suffix == '.parquet':
+        pytest.importorskip('pyarrow')
+    path = str(tmp_path / f'orders{suffix}')
+    write_orders(order_frames[0], path)
+    expected, expected_columns = read_order_file(order_files[0])
+    
+    df, columns = read_order_file(path)
+    assert columns == expected_columns
+    assert list(df.columns) == list(expected.columns)
+    # 주문번호·상품코드는 문자열, 금액은 숫자로 엑셀과 같은 값
+    assert df['주문번호'].astype(str).tolist() == expected['주문번호'].astype(str).tolist()
+    assert df['상품코드'].astype(str).tolist() == expected['상품코드'].astype(str).tolist()
+    for column in ['판매액', '배송비']:
+        assert df[column].astype(float).tolist() == expected[column].astype(float).tolist()
+    
+    # 분석 열만 읽은 경우와 모든 열을 읽은 경우
+    every, _ = read_order_file(path, usecols=None)
+    assert '수량' in every.columns and '수량' not in df.columns
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from app.main import (
+    AggregatedComparator,
+    ExcelComparator,
+    OrderComparatorBase,
+    aggregate_excel_orders
+)
+from app.readers import read_excel_orders
+
+@pytest.fixture(scope='module')
+def comparators(blank_name_files):
+    path1, path2 = blank_name_files
+    in_memory = ExcelComparator.from_frames(read_excel_orders(path1), read_excel_orders(path2))
+    # 청크 경계에서 주문이 나뉘도록 작은 청크로 집계
+    streaming = AggregatedComparator(
+        aggregate_excel_orders(path1, chunk_rows=50),
+        aggregate_excel_orders(path2, chunk_rows=50)
+    )
+    return in_memory, streaming
+
+@pytest.mark.parametrize('options', [{}, {'limit': 5}, {'summary_only': True}])
+def test_streaming_compare_matches_in_memory(comparators, options):
+    in_memory, streaming = comparators
+    assert streaming.compare(**options) == in_memory.compare(**options)
+
+def test_blank_customer_names_are_empty_strings(comparators):
+    for comparator in comparators:
+        for frame in comparator.get_exclusive_order_frames().values():
+            assert frame['customerName'].notna().all()
+
+def test_blank_product_codes_are_empty_strings(comparators):
+    in_memory, _ = comparators
+    blank_orders = set()
+    for comparator in comparators:
+        for frame in comparator.get_exclusive_order_frames().values():
+            products = frame['products'].str.split(', ')
+            assert not products.map(lambda codes: 'nan' in codes).any()
+            blank_orders.update(frame.loc[products.map(lambda codes: '' in codes), 'orderNo'])
+    assert blank_orders
+    # 행 단위 비교도 빈 상품코드를 ''로 짝지음
+    lines = in_memory.get_line_difference_frames()
+    assert (pd.concat([lines['added'], lines['removed']])['productCode'] == '').any()
+
+def test_comparator_base_requires_analysis_methods():
+    class Incomplete(OrderComparatorBase):
+        def get_summary(self):
+            return {}
+    
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -15,6 +15,11 @@ def create_package():
     files_to_include = {
         # Backend 파일들
         "backend/app/main.py": "backend/app/main.py",
+        "backend/app/caches.py": "backend/app/caches.py",
+        "backend/app/jobs.py": "backend/app/jobs.py",
+        "backend/app/metrics.py": "backend/app/metrics.py",
+        "backend/app/profiling.py": "backend/app/profiling.py",
+        "backend/app/readers.py": "backend/app/readers.py",
         "backend/requirements.txt": "backend/requirements.txt",
         
         # Frontend 파일들  
@@ -81,7 +81,12 @@ def create_embedded_app():
     # Backend 파일들
     backend_files = [
         "requirements.txt",
-        "app/main.py"
+        "app/main.py",
+        "app/caches.py",
+        "app/jobs.py",
+        "app/metrics.py",
+        "app/profiling.py",
+        "app/readers.py"
     ]
     
     print("📦 파일들을 패키징 중...")
@@ -1,10 +1,13 @@
-import React, { useState } from 'react';
-import { Upload, Button, Card, Table, Tabs, Alert, Spin, Row, Col, Statistic } from 'antd';
+import React, { useEffect, useState } from 'react';
+import { Upload, Button, Card, Table, Tabs, Alert, Spin, Row, Col, Statistic, Input } from 'antd';
 import { UploadOutlined, FileSearchOutlined, DownloadOutlined } from '@ant-design/icons';
 import type { UploadFile } from 'antd/es/upload/interface';
+import type { ColumnsType, SorterResult } from 'antd/es/table/interface';
 import './App.css';
 
 interface ComparisonResult {
+  sessionId: string;
+  sessionTtl: number;
   summary: {
     totalRows1: number;
     totalRows2: number;
@@ -14,7 +17,7 @@ interface ComparisonResult {
     differentOrders: number;
   };
   differences: {
-    shippingFee: ShippingDifference[];
+    shippingFeeCount: number;
     amounts: AmountDifference[];
   };
   columnComparison: {
@@ -22,12 +25,19 @@ interface ComparisonResult {
     onlyInFile1: string[];
     onlyInFile2: string[];
   };
-  exclusiveOrders: {
-    onlyInFile1: ExclusiveOrder[];
-    onlyInFile2: ExclusiveOrder[];
+  exclusiveOrderCounts: {
+    onlyInFile1: number;
+    onlyInFile2: number;
   };
 }
 
+interface PageResult<T> {
+  items: T[];
+  total: number;
+  page: number;
+  pageSize: number;
+}
+
 interface ExclusiveOrder {
   orderNo: string;
   customerName: string;
@@ -53,6 +63,86 @@ interface AmountDifference {
   difference: number;
 }
 
+const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
+interface SessionTableProps<T> {
+  path: string;
+  columns: ColumnsType<T>;
+  rowKey: string;
+  style?: React.CSSProperties;
+}
+
+// 비교 세션 결과를 서버에서 페이지 단위로 조회/정렬/검색하는 표
+function SessionTable<T extends object>({ path, columns, rowKey, style }: SessionTableProps<T>) {
+  const [data, setData] = useState<PageResult<T>>({ items: [], total: 0, page: 1, pageSize: 10 });
+  const [page, setPage] = useState(1);
+  const [pageSize, setPageSize] = useState(10);
+  const [sorter, setSorter] = useState<{ field?: string; order?: string }>({});
+  const [search, setSearch] = useState('');
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    const params = new URLSearchParams({ page: String(page), pageSize: String(pageSize) });
+    if (sorter.field && sorter.order) {
+      params.set('sortBy', sorter.field);
+      params.set('order', sorter.order === 'ascend' ? 'asc' : 'desc');
+    }
+    if (search) {
+      // 숫자면 주문번호, 아니면 수취인명으로 검색
+      params.set(/^\d+$/.test(search) ? 'orderNo' : 'customerName', search);
+    }
+
+    setLoading(true);
+    fetch(`${apiUrl}${path}?${params}`)
+      .then(async (response) => {
+        const body = await response.json().catch(() => null);
+        if (!response.ok) {
+          // 세션 만료(404), 서버 혼잡(503) 등은 서버가 보낸 안내(detail)를 보여주고 이전 결과는 유지
+          throw new Error(body?.detail || `결과 조회에 실패했습니다. (HTTP ${response.status})`);
+        }
+        return body as PageResult<T>;
+      })
+      .then((result) => {
+        setData(result);
+        setError(null);
+      })
+      .catch((error) => {
+        console.error('결과 조회 중 오류 발생:', error);
+        setError(error instanceof Error ? error.message : String(error));
+      })
+      .finally(() => setLoading(false));
+  }, [path, page, pageSize, sorter, search]);
+
+  return (
+    <div style={style}>
+      <Input.Search
+        placeholder="주문번호 또는 수취인명 검색"
+        allowClear
+        onSearch={(value) => {
+          setSearch(value.trim());
+          setPage(1);
+        }}
+        style={{ width: 300, marginBottom: '10px' }}
+      />
+      {error && <Alert message={error} type="error" showIcon style={{ marginBottom: '10px' }} />}
+      <Table<T>
+        columns={columns}
+        dataSource={data.items}
+        rowKey={rowKey}
+        loading={loading}
+        pagination={{ current: page, pageSize, total: data.total }}
+        onChange={(pagination, _filters, tableSorter) => {
+          const { field, order } = tableSorter as SorterResult<T>;
+          setPage(pagination.current || 1);
+          setPageSize(pagination.pageSize || 10);
+          setSorter({ field: field as string | undefined, order: order || undefined });
+        }}
+      />
+    </div>
+  );
+}
+
 const App: React.FC = () => {
   const [file1, setFile1] = useState<UploadFile | null>(null);
   const [file2, setFile2] = useState<UploadFile | null>(null);
@@ -72,8 +162,8 @@ const App: React.FC = () => {
     formData.append('file2', file2 as any);
 
     try {
-      const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:8000';
-      const response = await fetch(`${apiUrl}/api/compare`, {
+      // 요약만 받고 주문 목록은 세션 조회 API로 페이지 단위 조회
+      const response = await fetch(`${apiUrl}/api/compare?summaryOnly=true`, {
         method: 'POST',
         body: formData,
       });
@@ -88,7 +178,15 @@ const App: React.FC = () => {
     }
   };
 
-  const shippingColumns = [
+  const handleDownloadCsv = () => {
+    if (!result) {
+      return;
+    }
+    // 비교 세션에 저장된 결과를 내려받음 (파일 재업로드 없음)
+    window.location.href = `${apiUrl}/api/sessions/${result.sessionId}/export-csv`;
+  };
+
+  const shippingColumns: ColumnsType<ShippingDifference> = [
     {
       title: '주문번호',
       dataIndex: 'orderNo',
@@ -103,18 +201,21 @@ const App: React.FC = () => {
       title: '파일1 배송비',
       dataIndex: 'shippingFee1',
       key: 'shippingFee1',
+      sorter: true,
       render: (value: number) => `${value.toLocaleString()}원`,
     },
     {
       title: '파일2 배송비',
       dataIndex: 'shippingFee2',
       key: 'shippingFee2',
+      sorter: true,
       render: (value: number) => `${value.toLocaleString()}원`,
     },
     {
       title: '차이',
       dataIndex: 'difference',
       key: 'difference',
+      sorter: true,
       render: (value: number) => (
         <span style={{ color: value > 0 ? 'red' : value < 0 ? 'blue' : 'black' }}>
           {value > 0 ? '+' : ''}{value.toLocaleString()}원
@@ -153,7 +254,7 @@ const App: React.FC = () => {
     },
   ];
 
-  const exclusiveOrderColumns = [
+  const exclusiveOrderColumns: ColumnsType<ExclusiveOrder> = [
     {
       title: '주문번호',
       dataIndex: 'orderNo',
@@ -168,11 +269,13 @@ const App: React.FC = () => {
       title: '상품수',
       dataIndex: 'productCount',
       key: 'productCount',
+      sorter: true,
     },
     {
       title: '총 판매액',
       dataIndex: 'totalAmount',
       key: 'totalAmount',
+      sorter: true,
       render: (value: number) => `${value.toLocaleString()}원`,
     },
     {
@@ -196,7 +299,7 @@ const App: React.FC = () => {
                 return false;
               }}
               maxCount={1}
-              accept=".xlsx,.xls"
+              accept=".xlsx,.xls,.csv,.parquet"
             >
               <Button icon={<UploadOutlined />}>파일 선택</Button>
             </Upload>
@@ -211,7 +314,7 @@ const App: React.FC = () => {
                 return false;
               }}
               maxCount={1}
-              accept=".xlsx,.xls"
+              accept=".xlsx,.xls,.csv,.parquet"
             >
               <Button icon={<UploadOutlined />}>파일 선택</Button>
             </Upload>
@@ -258,12 +361,11 @@ const App: React.FC = () => {
           </Card>
 
           <Tabs defaultActiveKey="1">
-            <Tabs.TabPane tab="배송비 차이" key="1">
-              <Table
+            <Tabs.TabPane tab={`배송비 차이 (${result.differences.shippingFeeCount})`} key="1">
+              <SessionTable<ShippingDifference>
+                path={`/api/sessions/${result.sessionId}/shipping-differences`}
                 columns={shippingColumns}
-                dataSource={result.differences.shippingFee}
                 rowKey="orderNo"
-                pagination={{ pageSize: 10 }}
               />
             </Tabs.TabPane>
             
@@ -278,26 +380,24 @@ const App: React.FC = () => {
             
             <Tabs.TabPane tab="고유 주문번호" key="3">
               <Card>
-                <h3>파일1에만 있는 주문 ({result.exclusiveOrders?.onlyInFile1?.length || 0}개)</h3>
-                {result.exclusiveOrders?.onlyInFile1?.length > 0 ? (
-                  <Table
+                <h3>파일1에만 있는 주문 ({result.exclusiveOrderCounts.onlyInFile1}개)</h3>
+                {result.exclusiveOrderCounts.onlyInFile1 > 0 ? (
+                  <SessionTable<ExclusiveOrder>
+                    path={`/api/sessions/${result.sessionId}/exclusive-orders/onlyInFile1`}
                     columns={exclusiveOrderColumns}
-                    dataSource={result.exclusiveOrders.onlyInFile1}
                     rowKey="orderNo"
-                    pagination={{ pageSize: 10 }}
                     style={{ marginBottom: '30px' }}
                   />
                 ) : (
                   <Alert message="파일1에만 있는 고유 주문이 없습니다." type="info" style={{ marginBottom: '30px' }} />
                 )}
                 
-                <h3>파일2에만 있는 주문 ({result.exclusiveOrders?.onlyInFile2?.length || 0}개)</h3>
-                {result.exclusiveOrders?.onlyInFile2?.length > 0 ? (
-                  <Table
+                <h3>파일2에만 있는 주문 ({result.exclusiveOrderCounts.onlyInFile2}개)</h3>
+                {result.exclusiveOrderCounts.onlyInFile2 > 0 ? (
+                  <SessionTable<ExclusiveOrder>
+                    path={`/api/sessions/${result.sessionId}/exclusive-orders/onlyInFile2`}
                     columns={exclusiveOrderColumns}
-                    dataSource={result.exclusiveOrders.onlyInFile2}
                     rowKey="orderNo"
-                    pagination={{ pageSize: 10 }}
                   />
                 ) : (
                   <Alert message="파일2에만 있는 고유 주문이 없습니다." type="info" />
@@ -336,10 +436,7 @@ const App: React.FC = () => {
           <Button
             icon={<DownloadOutlined />}
             style={{ marginTop: '20px' }}
-            onClick={() => {
-              // CSV 다운로드 구현
-              console.log('Download CSV');
-            }}
+            onClick={handleDownloadCsv}
           >
             결과 다운로드 (CSV)
           </Button>